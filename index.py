@@ -1,26 +1,45 @@
 #!/usr/bin/env python3
 
 import curses
+import concurrent.futures
 import os
 import time
 import datetime
 import getpass
 import hashlib
+import hmac
 import base64
-import random
-import textwrap
+import collections
+import functools
+import importlib
+import importlib.util
+import itertools
+import secrets
 import traceback # For debugging curses issues
 
 # --- External Dependency ---
-try:
-    from cryptography.fernet import Fernet, InvalidToken
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-    from cryptography.hazmat.backends import default_backend
-except ImportError:
-    print("Error: 'cryptography' library not found.")
-    print("Please install it using: pip install cryptography")
-    exit(1)
+# Loaded on first use by _load_fernet() to keep the OpenSSL bindings off the startup path;
+# check_dependencies() still reports a missing install before the UI starts.
+_fernet = None # cryptography.fernet
+rfernet = None # Optional: Rust-native Fernet, wire-compatible and much faster on small notes
+
+def check_dependencies():
+    """Exits with install instructions if 'cryptography' is missing (without importing it)."""
+    if importlib.util.find_spec("cryptography") is None:
+        print("Error: 'cryptography' library not found.")
+        print("Please install it using: pip install cryptography")
+        exit(1)
+
+def _load_fernet():
+    """Imports the Fernet implementation(s) on first use and returns cryptography.fernet."""
+    global _fernet, rfernet
+    if _fernet is None:
+        _fernet = importlib.import_module("cryptography.fernet")
+        try:
+            rfernet = importlib.import_module("rfernet")
+        except ImportError:
+            rfernet = None
+    return _fernet
 # --- End External Dependency ---
 
 # --- Configuration ---
@@ -28,8 +47,17 @@ APP_NAME = "Roman Zecret"
 NOTES_DIR = "roman_zecret_notes"
 PASSWORD_FILE = ".roman_zecret_hash"
 SALT_SIZE = 16
-KEY_ITERATIONS = 100_000 # Adjust as needed for security/performance balance
+KEY_ITERATIONS = 100_000 # PBKDF2 rounds, for password files written before scrypt
+SCRYPT_R, SCRYPT_P = 8, 1 # scrypt block size and parallelism for new password files
+SCRYPT_N_RANGE = (2**14, 2**17) # Bounds for the calibrated scrypt cost (2**17 needs 128 MiB)
+KDF_TARGET_SECONDS = 0.25 # Calibrated key derivation time on this machine
+KDF_CACHE_SIZE = 4 # Recent password attempts whose derived key is kept for a retyped guess
 ENTRY_EXTENSION = ".rz"
+LEGACY_KEY_HASH_LENGTH = 64 # Hex digest length used by password files from older versions
+AUTH_RESULT_DELAY = 1.5 # Seconds a login verdict stays up; the same for success and failure
+ANIMATIONS_ENABLED = os.environ.get("ZECRET_ANIMATIONS") == "1" # Spooky progress frames; off by default
+_O_BINARY = getattr(os, "O_BINARY", 0) # Windows only: no newline translation on raw fds
+_TMP_SUFFIX = ".tmp" # Added to a note's name while _atomic_write_bytes writes its replacement
 
 # --- Spooky UI Elements ---
 SKULL_HEADER = [
@@ -44,6 +72,22 @@ SKULL_HEADER = [
 ]
 
 SPOOKY_EMOJIS = ["💀", "👻", "🎃", "🦇", "🕸️", "🕯️", "⚰️", "🔮", "😱", "🔪"]
+SPINNER_FRAMES = "|/-\\" # Turned while a key is being derived
+UNGETCH_LIMIT = 137 # Keys curses.ungetch() can queue (ncurses' FIFO size); one more raises curses.error
+
+MENU_OPTIONS = (
+    "Write New Zecret",
+    "Read a Zecret",
+    "Edit a Zecret",
+    "Import Encrypted Zecret",
+    "Change Master Password",
+    "Exit Roman Zecret",
+)
+# Row text per option, built once: (plain row as pre-encoded bytes, text that follows the highlight arrow and glyph)
+_MENU_RENDER = tuple((f"   {option}".encode('utf-8'), f" {option}") for option in MENU_OPTIONS)
+# Selection after an up/down key from each option, wrapping at the ends
+_MENU_PREV = tuple((i - 1) % len(MENU_OPTIONS) for i in range(len(MENU_OPTIONS)))
+_MENU_NEXT = tuple((i + 1) % len(MENU_OPTIONS) for i in range(len(MENU_OPTIONS)))
 
 # --- Color Pairs (Initialize in main) ---
 COLOR_PAIR_DEFAULT = 1
@@ -56,112 +100,464 @@ COLOR_PAIR_SUCCESS = 7
 COLOR_PAIR_INPUT = 8
 COLOR_PAIR_BORDER = 9
 
+# --- Module State ---
+ATTR = {} # Color pair id (or menu row state) -> curses attribute, filled in once by main() after init_pair
+_SYNC_OUTPUT = {"begin": None, "end": None} # Synchronized update sequences, set by main() if the terminal has them
+
+_notes_cache = {"mtime": None, "items": []} # Sorted note filenames, keyed on NOTES_DIR mtime
+_titles_cache = {"key": None, "titles": {}} # Decrypted title per note filename, valid for one key
+# (blake2b(password, key=salt), kdf) -> SessionKey, least recently used first. Only lives for one
+# password prompt's retries: the digest is a cheap verifier, so it is cleared as soon as that ends
+_kdf_cache = collections.OrderedDict()
+
+_sysrand = secrets.SystemRandom() # OS entropy source for filenames
+
+_emoji_iter = itertools.cycle(SPOOKY_EMOJIS) # Advanced once per message, not per redraw
+_menu_glyph = {"option": None, "emoji": SPOOKY_EMOJIS[0]} # Active-row glyph, changes with the selection
+
 # --- Helper Functions ---
 
-def get_key_from_password(password, salt):
-    """Derives a cryptographic key from the password and salt."""
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32, # Fernet key size
-        salt=salt,
-        iterations=KEY_ITERATIONS,
-        backend=default_backend()
-    )
-    key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+# The derived key for a session: the raw 32 bytes plus its Fernet (urlsafe base64) form,
+# encoded once at derivation time and passed around as the encryption key
+SessionKey = collections.namedtuple("SessionKey", ["raw", "b64"])
+
+# scrypt cost parameters, stored in the password file next to the hash
+ScryptParams = collections.namedtuple("ScryptParams", ["n", "r", "p"])
+
+def _scrypt(password_bytes, salt, params):
+    """Runs hashlib.scrypt with params, allowing it the memory those params need."""
+    maxmem = 128 * params.r * (params.n + params.p + 2) + 1024 * 1024 # OpenSSL refuses anything over maxmem
+    return hashlib.scrypt(password_bytes, salt=salt, n=params.n, r=params.r, p=params.p, maxmem=maxmem, dklen=32) # Fernet key size
+
+def _calibrate_scrypt():
+    """Returns ScryptParams whose derivation takes about KDF_TARGET_SECONDS on this machine."""
+    n, max_n = SCRYPT_N_RANGE
+    while n < max_n:
+        start = time.perf_counter()
+        _scrypt(b"calibration", bytes(SALT_SIZE), ScryptParams(n, SCRYPT_R, SCRYPT_P))
+        # Doubling n doubles the time: stop once that would overshoot more than staying undershoots
+        if time.perf_counter() - start >= KDF_TARGET_SECONDS * 2 / 3:
+            break
+        n *= 2
+    return ScryptParams(n, SCRYPT_R, SCRYPT_P)
+
+def _password_bytes(password):
+    """Returns password as bytes-like: typed passwords already are bytearrays, str is encoded."""
+    return password.encode() if isinstance(password, str) else password
+
+def _wipe(secret):
+    """Zeroes a bytearray password in place once it is no longer needed."""
+    secret[:] = bytes(len(secret))
+
+def get_key_from_password(password, salt, kdf=None):
+    """Derives a cryptographic key from the password and salt. Returns a SessionKey.
+    kdf is the ScryptParams from the password file, or None for older PBKDF2 files."""
+    if kdf is None:
+        # hashlib runs the whole PBKDF2 loop inside OpenSSL (SHA-NI where available)
+        raw_key = hashlib.pbkdf2_hmac("sha256", _password_bytes(password), salt, KEY_ITERATIONS, dklen=32) # Fernet key size
+    else:
+        raw_key = _scrypt(_password_bytes(password), salt, kdf)
+    return SessionKey(raw_key, base64.urlsafe_b64encode(raw_key))
+
+def _derive_cached(password, salt, kdf=None):
+    """get_key_from_password(), remembering the last few results so a retyped guess skips the KDF."""
+    # Keyed on a salted digest, so the cache never holds the passwords themselves
+    cache_key = (hashlib.blake2b(_password_bytes(password), key=salt, digest_size=32).digest(), kdf)
+    key = _kdf_cache.get(cache_key)
+    if key is None:
+        key = get_key_from_password(password, salt, kdf)
+        _kdf_cache[cache_key] = key
+        if len(_kdf_cache) > KDF_CACHE_SIZE:
+            _kdf_cache.popitem(last=False)
+    else:
+        _kdf_cache.move_to_end(cache_key)
     return key
 
+class _RustFernet:
+    """Adapts rfernet.Fernet to the bytes-in/bytes-out API of cryptography's Fernet."""
+
+    def __init__(self, key):
+        self._fernet = rfernet.Fernet(key.b64.decode('ascii'))
+
+    def encrypt(self, data):
+        return self._fernet.encrypt(data).encode('ascii')
+
+    def decrypt(self, token):
+        try:
+            return self._fernet.decrypt(token.decode('ascii'))
+        except (rfernet.DecryptionError, UnicodeDecodeError):
+            raise _fernet.InvalidToken
+
+@functools.lru_cache(maxsize=4)
+def _get_fernet(key):
+    """Returns a Fernet instance for the SessionKey, reused across calls."""
+    fernet_module = _load_fernet()
+    if rfernet is not None:
+        return _RustFernet(key)
+    return fernet_module.Fernet(key.b64)
+
 def encrypt_data(data, key):
-    """Encrypts data using Fernet."""
-    f = Fernet(key)
-    # Prepend a title separator for easier parsing later
+    """Encrypts data (str or bytes) using Fernet."""
     # Ensure data is bytes
     if isinstance(data, str):
         data = data.encode('utf-8')
-    return f.encrypt(data)
+    return _get_fernet(key).encrypt(data)
 
 def decrypt_data(encrypted_data, key):
     """Decrypts data using Fernet. Returns None on failure."""
-    f = Fernet(key)
     try:
-        decrypted = f.decrypt(encrypted_data)
+        decrypted = _get_fernet(key).decrypt(encrypted_data)
         return decrypted.decode('utf-8') # Return as string
-    except InvalidToken:
+    except _fernet.InvalidToken:
         return None # Indicates wrong key or corrupted data
     except Exception: # Catch other potential decryption errors
         return None
 
+def verify_token(encrypted_data, key):
+    """Checks a Fernet token's version byte and HMAC against key without decrypting it."""
+    # Token layout: version (1) | timestamp (8) | IV (16) | ciphertext | HMAC-SHA256 (32),
+    # signed with the first half of the raw key
+    try:
+        token = base64.urlsafe_b64decode(encrypted_data)
+    except (TypeError, ValueError):
+        return False
+    if len(token) < 1 + 8 + 16 + 32 or token[0] != 0x80:
+        return False
+    expected = hmac.new(key.raw[:16], token[:-32], hashlib.sha256).digest()
+    return hmac.compare_digest(expected, token[-32:])
+
 def save_password_hash(password):
-    """Hashes the password with a new salt and saves salt:hash."""
+    """Hashes the password with a new salt and saves salt:hash:scrypt:n:r:p."""
     salt = os.urandom(SALT_SIZE)
-    key = get_key_from_password(password, salt) # Use the KDF here too
-    # Store salt and a hash of the *derived key* for verification, not the raw password hash
-    # This verifies the key derivation process itself
-    hasher = hashlib.sha256()
-    hasher.update(key)
-    key_hash = hasher.hexdigest()
-
     try:
+        # Tuned to this machine on first run; a password change keeps the cost already in use
+        stored_n = _stored_scrypt_n()
+        kdf = ScryptParams(stored_n, SCRYPT_R, SCRYPT_P) if stored_n else _calibrate_scrypt()
+        key = get_key_from_password(password, salt, kdf) # Use the KDF here too
+        # Store salt and a hash of the *derived key* for verification, not the raw password hash
+        # This verifies the key derivation process itself
+        key_hash = base64.b64encode(hashlib.sha256(key.raw).digest()).decode()
+
         with open(PASSWORD_FILE, "w") as f:
-            f.write(f"{base64.b64encode(salt).decode()}:{key_hash}")
+            f.write(f"{base64.b64encode(salt).decode()}:{key_hash}:scrypt:{kdf.n}:{kdf.r}:{kdf.p}")
         # Set restrictive permissions (macOS/Linux)
         os.chmod(PASSWORD_FILE, 0o600)
         return salt, key # Return salt and the derived key for immediate use
-    except IOError:
+    except (OSError, ValueError, MemoryError): # File not writable, or OpenSSL could not give scrypt its memory
         return None, None
 
 def load_password_salt_and_hash():
-    """Loads salt and hash from the password file."""
+    """Loads salt and hash from the password file. The hash keeps any KDF fields that follow it."""
     try:
         with open(PASSWORD_FILE, "r") as f:
             line = f.readline().strip()
-            salt_b64, stored_key_hash = line.split(':')
+            salt_b64, stored_key_hash = line.split(':', 1)
             salt = base64.b64decode(salt_b64)
             return salt, stored_key_hash
     except (FileNotFoundError, ValueError, IndexError, IOError):
         return None, None
 
+def _parse_kdf(kdf_fields):
+    """Returns the ScryptParams from a password file's "scrypt:n:r:p" fields, or None if there are none."""
+    if not kdf_fields:
+        return None # Written before scrypt: PBKDF2
+    name, n, r, p = kdf_fields.split(':')
+    params = ScryptParams(int(n), int(r), int(p))
+    if name != "scrypt" or params.n < 2 or params.n & (params.n - 1) or params.r < 1 or params.p < 1:
+        raise ValueError(f"unsupported KDF fields: {kdf_fields}")
+    return params
+
+def _stored_scrypt_n():
+    """Returns the scrypt cost n from the current password file, or None if it has none to reuse."""
+    _, stored_key_hash = load_password_salt_and_hash()
+    if stored_key_hash is None:
+        return None
+    try:
+        kdf = _parse_kdf(stored_key_hash.partition(':')[2])
+    except ValueError: # Corrupt KDF fields: calibrate afresh
+        return None
+    return kdf.n if kdf else None
+
 def verify_password(password, salt, stored_key_hash):
     """Verifies the entered password against the stored hash using the salt."""
-    key = get_key_from_password(password, salt)
-    hasher = hashlib.sha256()
-    hasher.update(key)
-    current_key_hash = hasher.hexdigest()
-    return current_key_hash == stored_key_hash, key # Return boolean and the derived key
-
-def get_sorted_notes():
-    """Returns a sorted list of note filenames."""
+    key_hash, _, kdf_fields = stored_key_hash.partition(':')
     try:
-        notes = [f for f in os.listdir(NOTES_DIR) if f.endswith(ENTRY_EXTENSION)]
-        # Sort by filename (which includes timestamp)
-        notes.sort(reverse=True) # Show newest first
-        return notes
+        kdf = _parse_kdf(kdf_fields)
+    except ValueError: # Corrupt KDF fields in the password file
+        return False, None
+    key = _derive_cached(password, salt, kdf)
+    try:
+        if len(key_hash) == LEGACY_KEY_HASH_LENGTH:
+            # Older password files store the hex SHA-256 of the base64-encoded key
+            current_digest = hashlib.sha256(key.b64).digest()
+            stored_digest = bytes.fromhex(key_hash)
+        else:
+            current_digest = hashlib.sha256(key.raw).digest()
+            stored_digest = base64.b64decode(key_hash)
+    except ValueError: # Corrupt hash in the password file
+        return False, key
+    # Constant-time comparison of the raw 32-byte digests
+    return hmac.compare_digest(current_digest, stored_digest), key # Return boolean and the derived key
+
+def _read_all(path):
+    """Reads a whole file with raw os.read calls, skipping the buffered IO layer."""
+    fd = os.open(path, os.O_RDONLY | _O_BINARY) # Python opens fds close-on-exec already
+    try:
+        remaining = os.fstat(fd).st_size
+        chunks = []
+        while remaining > 0:
+            chunk = os.read(fd, remaining) # Normally the whole file in one call
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+def _write_all(path, data, exclusive=False, sync=False):
+    """Writes data to a file (created with 0o600, truncated) using raw os.write calls.
+    With exclusive=True an existing file is left alone and FileExistsError is raised;
+    with sync=True the data is flushed to disk before the file is closed."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | (os.O_EXCL if exclusive else os.O_TRUNC) | _O_BINARY, 0o600)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):] # Retry short writes
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _atomic_write_bytes(path, data):
+    """Writes data to a temp file beside path, then renames it over path in one step."""
+    tmp_path = path + _TMP_SUFFIX # Not a note name, so listings never pick it up
+    try:
+        # The data must be on disk before the rename is, or a crash could leave the new name
+        # pointing at an empty file; in the rekey pool this fsync runs in each worker
+        _write_all(tmp_path, data, sync=True)
+        os.replace(tmp_path, path) # Readers see the old note or the new one, never half of each
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _fsync_dir(path):
+    """Flushes a directory's entries (e.g. a batch of renames) to disk. No-op where unsupported."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return # Windows can't open directories
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _decrypt_title(path, key):
+    """Decrypts a note file and returns only its title (None if unreadable)."""
+    try:
+        decrypted = _get_fernet(key).decrypt(_read_all(path))
+    except Exception:
+        return None
+    parts = decrypted.split(b"\n--CONTENT--\n", 1)
+    if len(parts) == 2 and parts[0].startswith(b"TITLE:"):
+        return parts[0][len(b"TITLE:"):].decode('utf-8', 'replace').strip()
+    return None
+
+def _entry_payload(title, content_lines):
+    """Builds the plaintext of a note ("TITLE:..." + separator + lines) as UTF-8 bytes in one buffer."""
+    buf = bytearray(b"TITLE:")
+    buf += title.encode('utf-8')
+    buf += b"\n--CONTENT--\n"
+    for i, line in enumerate(content_lines):
+        if i:
+            buf += b"\n"
+        buf += line.encode('utf-8')
+    return bytes(buf)
+
+def _rekey_file(path, old_key, new_key):
+    """Re-encrypts one note file from old_key to new_key in place. Returns True on success."""
+    # Module-level so process pool workers can run it
+    try:
+        # Both Fernet instances are built once per worker (lru_cache) and reused for every note
+        old_fernet, new_fernet = _get_fernet(old_key), _get_fernet(new_key)
+
+        # a. Read encrypted data (one os.read sized from fstat)
+        encrypted_data = _read_all(path)
+
+        # b. Decrypt with OLD key. The plaintext stays bytes: it only goes straight back into
+        # Fernet, so decoding it to str and re-encoding would be two full copies for nothing
+        plaintext = old_fernet.decrypt(encrypted_data) # Raises on a wrong key or corrupt file
+
+        # c. Encrypt with NEW key
+        new_encrypted_data = new_fernet.encrypt(plaintext)
+
+        # d. Replace the file with the newly encrypted data (the directory fsync is batched by the caller)
+        _atomic_write_bytes(path, new_encrypted_data)
+        return True
+    except Exception: # Leave the file untouched
+        return False
+
+def get_sorted_notes(encryption_key=None):
+    """Returns a sorted list of note filenames, or (filename, title) tuples if a key is given."""
+    try:
+        dir_mtime = os.stat(NOTES_DIR).st_mtime_ns
     except FileNotFoundError:
         return []
 
+    # Only rescan when the directory has changed since the last listing
+    if dir_mtime != _notes_cache["mtime"]:
+        names = []
+        stale = [] # Temp files a crash left between write and rename, each a full copy of a note
+        with os.scandir(NOTES_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith(ENTRY_EXTENSION):
+                    names.append(entry.name)
+                elif entry.name.endswith(ENTRY_EXTENSION + _TMP_SUFFIX):
+                    stale.append(entry.path)
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if stale:
+            dir_mtime = os.stat(NOTES_DIR).st_mtime_ns # The removals bumped it
+        # Sort by filename (which includes timestamp)
+        names.sort(reverse=True) # Show newest first
+        _notes_cache["mtime"] = dir_mtime
+        _notes_cache["items"] = names
+        # Forget titles of notes that are gone
+        present = set(names)
+        titles = _titles_cache["titles"]
+        for name in [name for name in titles if name not in present]:
+            del titles[name]
+
+    notes = _notes_cache["items"]
+    if encryption_key is None:
+        return list(notes) # A copy: callers may reorder or trim it, the cache must not change
+
+    titles = _titles_cache["titles"]
+    if encryption_key != _titles_cache["key"]: # e.g. after a password change
+        titles.clear()
+        _titles_cache["key"] = encryption_key
+
+    # Only notes without a cached title are decrypted (concurrently; the crypto runs outside the GIL)
+    missing = [note for note in notes if note not in titles]
+    if missing:
+        paths = [os.path.join(NOTES_DIR, note) for note in missing]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            titles.update(zip(missing, pool.map(functools.partial(_decrypt_title, key=encryption_key), paths)))
+    return [(note, titles[note]) for note in notes]
+
+def _remember_note(filename, title=None, key=None):
+    """Inserts a newly written note (and its title, if known) into the cached listing."""
+    if _notes_cache["mtime"] is None or not filename.endswith(ENTRY_EXTENSION):
+        return # Nothing cached yet, or not a note the listing would show
+    if title is not None and key == _titles_cache["key"]:
+        _titles_cache["titles"][filename] = title.strip() # As _decrypt_title would read it back
+    items = _notes_cache["items"]
+    # Binary search for the insertion point in the newest-first list
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if items[mid] > filename:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo == len(items) or items[lo] != filename:
+        items.insert(lo, filename)
+    # Our own write bumped the directory mtime; adopt it so the cache stays valid
+    _notes_cache["mtime"] = os.stat(NOTES_DIR).st_mtime_ns
+
+@functools.lru_cache(maxsize=2048)
+def _wrap_first(line, width):
+    """Returns the first wrapped segment of a line and whether more text follows it."""
+    # Cached on (line, width), so redraws of unchanged lines do no wrapping work
+    if len(line) <= width:
+        return line, False
+    # Break at the last space that keeps the segment within width (C-level scan)
+    break_idx = line.rfind(' ', 0, width + 1)
+    word_end = line.find(' ', break_idx + 1)
+    if word_end == -1:
+        word_end = len(line)
+    if break_idx <= 0 or word_end - break_idx - 1 > width:
+        break_idx = width # No space to break at, or the next word fits no row either: split it
+    return line[:break_idx], True
+
+def safe_addstr(win, y, x, text, attr=0):
+    """addstr that checks the position first and clips text to the window instead of raising."""
+    max_y, max_x = win.getmaxyx()
+    if 0 <= y < max_y and 0 <= x < max_x - 1:
+        win.addstr(y, x, text[:max_x-x-1], attr)
+
+def _clear_prompt_area(win, y):
+    """Blanks everything from row y to the bottom of the window (retried password prompts)."""
+    win.move(y, 0)
+    win.clrtobot()
+
 def clear_screen(stdscr):
     """Clears the terminal screen."""
     stdscr.clear()
 
+@functools.lru_cache(maxsize=8)
+def _header_blob(max_x):
+    """Returns the whole header as one UTF-8 encoded string for a given screen width, each line centered."""
+    # Lines are clipped to the screen edge; addstr turns each newline into clrtoeol + next row.
+    # Encoded here, once per width, so addstr doesn't re-encode it on every repaint
+    return "\n".join(" " * max(0, (max_x - len(line)) // 2) + line[:max_x-1] for line in SKULL_HEADER).encode('utf-8')
+
 def draw_header(stdscr, y_offset=1):
     """Draws the spooky skull header."""
     max_y, max_x = stdscr.getmaxyx()
     header_height = len(SKULL_HEADER)
     if max_y < header_height + y_offset: return # Not enough space
 
-    for i, line in enumerate(SKULL_HEADER):
-        x = max(0, (max_x - len(line)) // 2)
-        safe_line = line[:max_x-1] # Prevent writing past screen edge
-        try:
-            stdscr.addstr(y_offset + i, x, safe_line, curses.color_pair(COLOR_PAIR_HEADER) | curses.A_BOLD)
-        except curses.error:
-            pass # Ignore errors if writing fails near edge
+    # Cached per width, so a resized terminal simply gets a new entry; one addstr for all lines
+    try:
+        stdscr.addstr(y_offset, 0, _header_blob(max_x), ATTR[COLOR_PAIR_HEADER] | curses.A_BOLD)
+    except curses.error:
+        pass # Ignore errors if writing fails near edge
+
+def _wait_until(stdscr, deadline):
+    """Blocks until the time.monotonic() deadline, reading keys meanwhile and handing them back after."""
+    typed = []
+    try:
+        # Poll getch() with the time that is left, so the wait ends on the deadline whatever arrives
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            stdscr.timeout(max(1, int(remaining * 1000)))
+            key = stdscr.getch()
+            if key != -1 and len(typed) < UNGETCH_LIMIT: # Keys beyond what ungetch() can hold are dropped
+                typed.append(key)
+    finally:
+        stdscr.timeout(-1) # Back to blocking reads
+    for key in reversed(typed): # ungetch() pushes to the front of the queue
+        curses.ungetch(key)
+
+def _doupdate():
+    """curses.doupdate(), framed as one synchronized update on terminals that support it."""
+    if _SYNC_OUTPUT["begin"] is None:
+        curses.doupdate()
+        return
+    # doupdate() flushes its own buffer before returning, so these land either side of the frame
+    os.write(1, _SYNC_OUTPUT["begin"]) # curses draws to stdout
+    try:
+        curses.doupdate()
+    finally:
+        os.write(1, _SYNC_OUTPUT["end"])
 
-def draw_message(stdscr, message, y, color_pair, delay=0, spooky=True):
+def draw_message(stdscr, message, y, color_pair, delay=0, spooky=True, refresh=True):
     """Displays a message at a specific row, clears it after a delay."""
     max_y, max_x = stdscr.getmaxyx()
     if y >= max_y: return
 
-    prefix = random.choice(SPOOKY_EMOJIS) + " " if spooky else ""
+    prefix = next(_emoji_iter) + " " if spooky else ""
     full_message = prefix + message
     x = max(0, (max_x - len(full_message)) // 2)
     
@@ -174,12 +570,13 @@ def draw_message(stdscr, message, y, color_pair, delay=0, spooky=True):
         # Clear the line first
         stdscr.move(y, 0)
         stdscr.clrtoeol()
-        stdscr.attron(curses.color_pair(color_pair) | curses.A_BOLD)
-        stdscr.addstr(y, x, full_message)
-        stdscr.attroff(curses.color_pair(color_pair) | curses.A_BOLD)
-        stdscr.refresh()
+        stdscr.addstr(y, x, full_message, ATTR[color_pair] | curses.A_BOLD)
+        if refresh or delay > 0:
+            stdscr.refresh()
+        else:
+            stdscr.noutrefresh() # Staged; goes out with the caller's next refresh/doupdate
         if delay > 0:
-            time.sleep(delay)
+            _wait_until(stdscr, time.monotonic() + delay)
             # Clear the message line after delay
             stdscr.move(y, 0)
             stdscr.clrtoeol()
@@ -188,40 +585,97 @@ def draw_message(stdscr, message, y, color_pair, delay=0, spooky=True):
         pass # Ignore potential errors writing to screen edges
 
 
+def _spooky_animate(stdscr, y, frames, total_seconds=0.3):
+    """Shows frames as spooky messages on row y, taking at most total_seconds overall."""
+    # Each frame waits in getch() rather than sleep(), so a keypress ends the animation early
+    stdscr.timeout(max(1, int(total_seconds * 1000 / len(frames))))
+    try:
+        for frame in frames:
+            draw_message(stdscr, frame, y, COLOR_PAIR_INFO, spooky=True)
+            key = stdscr.getch()
+            if key != -1:
+                curses.ungetch(key) # Leave it for whatever reads input next
+                break
+    finally:
+        stdscr.timeout(-1) # Back to blocking reads
+
+def _run_with_animation(stdscr, y, frames, func, *args):
+    """Returns func(*args); with animations on, the frames play while it runs in a worker thread."""
+    if not ANIMATIONS_ENABLED:
+        return func(*args)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(func, *args)
+        _spooky_animate(stdscr, y, frames)
+        return pending.result()
+
+def _run_with_spinner(stdscr, y, x, func, *args):
+    """Returns func(*args), run in a worker thread while a spinner turns at (y, x)."""
+    typed = [] # Keys pressed meanwhile, handed back once func is done
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(func, *args)
+        # getch() with a timeout paces the spinner and keeps input (and resizes) flowing
+        stdscr.timeout(80)
+        try:
+            for frame in itertools.cycle(SPINNER_FRAMES):
+                if pending.done():
+                    break
+                try:
+                    stdscr.addstr(y, x, frame, ATTR[COLOR_PAIR_INFO] | curses.A_BOLD)
+                except curses.error:
+                    pass
+                key = stdscr.getch() # Also refreshes the screen
+                if key != -1 and len(typed) < UNGETCH_LIMIT: # Keys beyond what ungetch() can hold are dropped
+                    typed.append(key)
+        finally:
+            stdscr.timeout(-1) # Back to blocking reads
+            try:
+                stdscr.addstr(y, x, " ")
+            except curses.error:
+                pass
+        for key in reversed(typed): # ungetch() pushes to the front of the queue
+            curses.ungetch(key)
+        return pending.result()
+
+
 def get_string_input(stdscr, y, x, prompt, max_len=50, password=False):
-    """Gets string input from the user at a specific position."""
+    """Gets string input from the user at a specific position.
+    Passwords come back as a bytearray, so the caller can _wipe() it after use."""
     max_y, max_x = stdscr.getmaxyx()
     if y >= max_y or x + len(prompt) + 1 >= max_x:
-        return "" # Not enough space
+        return bytearray() if password else "" # Not enough space (same type as a typed answer)
 
-    stdscr.attron(curses.color_pair(COLOR_PAIR_INPUT))
-    stdscr.addstr(y, x, prompt)
-    stdscr.attroff(curses.color_pair(COLOR_PAIR_INPUT))
-    stdscr.refresh()
+    stdscr.addstr(y, x, prompt, ATTR[COLOR_PAIR_INPUT])
+    stdscr.noutrefresh()
+    _doupdate() # Prompt goes out together with anything the caller staged
 
-    curses.echo() # Enable echoing characters
+    # No curses.echo(): keys are drawn here (masked for passwords), one cell at a time
     curses.curs_set(1) # Show cursor
     
     # Input window/field
     input_win_x = x + len(prompt) + 1
     input_win_width = min(max_len, max_x - input_win_x - 1)
     input_win = curses.newwin(1, input_win_width, y, input_win_x)
-    input_win.bkgd(' ', curses.color_pair(COLOR_PAIR_DEFAULT)) # Background for input field
+    input_win.bkgd(' ', ATTR[COLOR_PAIR_DEFAULT]) # Background for input field
 
-    text = ""
+    text = bytearray() if password else "" # Edited in place for passwords, never copied
     input_win.keypad(True)
+    scrolled = False # Field currently shows only the tail of the text
 
     while True:
-        input_win.clear()
-        display_text = "*" * len(text) if password else text
-        # Handle scrolling display if text exceeds width
-        start_display = max(0, len(display_text) - input_win_width + 1)
-        input_win.addstr(0, 0, display_text[start_display:], curses.color_pair(COLOR_PAIR_INPUT))
-        input_win.refresh()
+        # Handle scrolling display if text exceeds width; only then is the whole field repainted
+        start_display = max(0, len(text) - input_win_width + 1)
+        if start_display or scrolled:
+            display_text = "*" * len(text) if password else text
+            input_win.erase()
+            input_win.addstr(0, 0, display_text[start_display:], ATTR[COLOR_PAIR_INPUT])
+            scrolled = start_display > 0
+        input_win.move(0, len(text) - start_display) # getch() below refreshes the window
 
         try:
             key = input_win.getch()
         except KeyboardInterrupt: # Allow Ctrl+C to exit input
+            if password:
+                _wipe(text)
             text = None # Signal cancellation
             break
 
@@ -229,83 +683,99 @@ def get_string_input(stdscr, y, x, prompt, max_len=50, password=False):
             break
         elif key in [curses.KEY_BACKSPACE, 127, 8]: # Backspace
             if len(text) > 0:
-                text = text[:-1]
+                if password:
+                    del text[-1]
+                else:
+                    text = text[:-1]
+                if not scrolled:
+                    input_win.addch(0, len(text), " ") # Blank just the removed cell
         elif key == 27: # Escape key - treat as cancel
+             if password:
+                 _wipe(text)
              text = None # Signal cancellation
              break
         elif 32 <= key <= 126: # Printable ASCII characters
             if len(text) < max_len:
-                 text += chr(key)
+                 if password:
+                     text.append(key)
+                 else:
+                     text += chr(key)
+                 if len(text) < input_win_width: # Still fits: draw just the new cell
+                     input_win.addch(0, len(text) - 1, "*" if password else chr(key), ATTR[COLOR_PAIR_INPUT])
         # Add more key handling if needed (arrows, etc.)
 
-    curses.noecho() # Disable echoing
     curses.curs_set(0) # Hide cursor
     del input_win # Clean up window
 
     # Clear the prompt and input area
     stdscr.move(y, x)
     stdscr.clrtoeol()
-    stdscr.refresh()
+    stdscr.noutrefresh()
+    _doupdate()
 
     return text
 
 
-def get_multiline_input(stdscr, y_start, x_start, prompt):
-    """Gets multi-line input (basic editor). Returns a list of lines."""
+def get_multiline_input(stdscr, y_start, x_start, prompt, initial_lines=None):
+    """Gets multi-line input (basic editor), optionally pre-filled. Returns a list of lines."""
     max_y, max_x = stdscr.getmaxyx()
-    lines = [""]
+    # Each line is a mutable list of characters, edited in place and joined only for display
+    lines = [list(line) for line in initial_lines] if initial_lines else [[]]
+    line_texts = list(initial_lines) if initial_lines else [""]  # Joined text per line, None once edited
     current_line_idx = 0
-    cursor_x = 0 # Position within the current line
+    cursor_x = 0  # Position within the current line
     
-    stdscr.attron(curses.color_pair(COLOR_PAIR_INPUT))
-    stdscr.addstr(y_start, x_start, prompt)
-    stdscr.addstr(y_start + 1, x_start, "(Press Ctrl+D or Ctrl+G to finish)")
-    stdscr.attroff(curses.color_pair(COLOR_PAIR_INPUT))
+    stdscr.addstr(y_start, x_start, prompt, ATTR[COLOR_PAIR_INPUT])
+    stdscr.addstr(y_start + 1, x_start, "(Press Ctrl+D or Ctrl+G to finish)", ATTR[COLOR_PAIR_INPUT])
     
-    curses.curs_set(1) # Show cursor
+    curses.curs_set(1)  # Show cursor
     
     edit_win_y = y_start + 2
-    edit_win_h = max_y - edit_win_y - 1 # Leave space at bottom
+    edit_win_h = max_y - edit_win_y - 1  # Leave space at bottom
     edit_win_w = max_x - x_start - 2
     
     if edit_win_h <= 0 or edit_win_w <= 0:
-        return None # Not enough space
+        return None  # Not enough space
 
     # Keep track of top line displayed for scrolling
     top_line_idx = 0 
+
+    # Only rows that changed are redrawn; cursor-only moves redraw nothing
+    redraw_from = 0  # Line index from which every visible row is redrawn (split/merge/scroll), or None
+    dirty_lines = set()  # Indices of lines whose text changed in place
+    drawn_rows = [None] * edit_win_h  # What each row last showed, so identical rows aren't re-sent
     
     while True:
         # --- Redraw the editing area ---
-        stdscr.move(edit_win_y, x_start)
-        for i in range(edit_win_h):
-             stdscr.clrtoeol() # Clear line before writing
-             line_idx_to_draw = top_line_idx + i
-             if line_idx_to_draw < len(lines):
-                 # Simple wrapping for display
-                 wrapped_lines = textwrap.wrap(lines[line_idx_to_draw], width=edit_win_w)
-                 if not wrapped_lines: # Handle empty line case after wrap
-                     wrapped_lines = [""] 
-                 # Display only the relevant part if wrapped (this part is simplified)
-                 # For simplicity, just show the first wrapped segment or indicate more
-                 display_line = wrapped_lines[0]
-                 if len(wrapped_lines) > 1:
-                     display_line = display_line[:-3] + "..." # Indicate more content
-                     
-                 # Truncate if still too long (shouldn't happen with wrap)
-                 display_line = display_line[:edit_win_w] 
-                 
-                 try:
-                    stdscr.addstr(edit_win_y + i, x_start, display_line)
-                 except curses.error:
-                     pass # Ignore drawing errors at edges
-             else:
-                 # Clear lines below content
-                 stdscr.move(edit_win_y + i, x_start)
-                 stdscr.clrtoeol()
+        rows_to_draw = {idx - top_line_idx for idx in dirty_lines
+                        if top_line_idx <= idx < top_line_idx + edit_win_h}
+        if redraw_from is not None:
+            rows_to_draw.update(range(max(0, redraw_from - top_line_idx), edit_win_h))
+        redraw_from = None
+        dirty_lines.clear()
+
+        for i in rows_to_draw:
+            line_idx_to_draw = top_line_idx + i
+            display_line = ""  # Rows past the last line are blanked
+            if line_idx_to_draw < len(lines):
+                # Display only the first wrapped segment, or indicate more
+                display_line = line_texts[line_idx_to_draw]
+                if display_line is None:  # Re-join only lines edited since they were last drawn
+                    display_line = line_texts[line_idx_to_draw] = "".join(lines[line_idx_to_draw])
+                if len(display_line) > edit_win_w:  # Lines that fit skip the wrap cache entirely
+                    display_line = _wrap_first(display_line, edit_win_w)[0][:edit_win_w-3] + "..."  # Indicate more content
+
+            # Padding to the full width overwrites the old text, so no separate clrtoeol is needed
+            row_text = display_line.ljust(edit_win_w)
+            if row_text == drawn_rows[i]:
+                continue  # Row already shows this (e.g. blank rows on a full repaint)
+            drawn_rows[i] = row_text
+            try:
+                stdscr.addnstr(edit_win_y + i, x_start, row_text, edit_win_w)
+            except curses.error:
+                pass  # Ignore drawing errors at edges
                  
         # --- Place cursor ---
-        # Calculate cursor position based on current line and potential wrapping
-        current_line_content = lines[current_line_idx]
         cursor_y_in_win = (current_line_idx - top_line_idx) 
         # Simplified cursor X - doesn't handle wrapping accurately
         cursor_x_in_win = cursor_x 
@@ -317,122 +787,175 @@ def get_multiline_input(stdscr, y_start, x_start, prompt):
         try:
             stdscr.move(edit_win_y + cursor_y_in_win, x_start + cursor_x_in_win)
         except curses.error:
-             # If cursor move fails, try moving to start of line
-             try: stdscr.move(edit_win_y + cursor_y_in_win, x_start)
-             except curses.error: pass # Give up if even that fails
+            # If cursor move fails, try moving to start of line
+            try: 
+                stdscr.move(edit_win_y + cursor_y_in_win, x_start)
+            except curses.error: 
+                pass  # Give up if even that fails
 
-        stdscr.refresh()
+        # Stage the frame and flush it to the terminal in a single update
+        stdscr.noutrefresh()
+        _doupdate()
         
         # --- Get Input ---
+        # Block for one key, then apply everything already queued behind it (a paste arrives
+        # as a burst) before drawing, so a burst costs one frame instead of one per character
         try:
-             key = stdscr.getch()
+            key = stdscr.getch()
         except KeyboardInterrupt:
-             lines = None # Cancel
-             break
-             
-        # --- Process Input ---
-        current_line = lines[current_line_idx]
-
-        if key in [curses.KEY_ENTER, 10, 13]: # Newline
-            before_cursor = current_line[:cursor_x]
-            after_cursor = current_line[cursor_x:]
-            lines[current_line_idx] = before_cursor
-            current_line_idx += 1
-            lines.insert(current_line_idx, after_cursor)
-            cursor_x = 0
-        elif key in [curses.KEY_BACKSPACE, 127, 8]: # Backspace
-            if cursor_x > 0:
-                lines[current_line_idx] = current_line[:cursor_x-1] + current_line[cursor_x:]
-                cursor_x -= 1
-            elif current_line_idx > 0: # Backspace at start of line, merge with previous
-                 prev_line = lines[current_line_idx-1]
-                 cursor_x = len(prev_line) # Move cursor to end of previous line
-                 lines[current_line_idx-1] = prev_line + current_line
-                 del lines[current_line_idx]
-                 current_line_idx -= 1
-        elif key == curses.KEY_DC: # Delete key (may not work on all terminals)
-             if cursor_x < len(current_line):
-                 lines[current_line_idx] = current_line[:cursor_x] + current_line[cursor_x+1:]
-             # Add logic here to merge with next line if at end of current line
-        elif key == curses.KEY_UP:
-             if current_line_idx > 0:
-                 current_line_idx -= 1
-                 # Try to maintain horizontal position
-                 cursor_x = min(cursor_x, len(lines[current_line_idx]))
-        elif key == curses.KEY_DOWN:
-             if current_line_idx < len(lines) - 1:
-                 current_line_idx += 1
-                 # Try to maintain horizontal position
-                 cursor_x = min(cursor_x, len(lines[current_line_idx]))
-        elif key == curses.KEY_LEFT:
-             if cursor_x > 0:
-                 cursor_x -= 1
-             elif current_line_idx > 0: # Move to end of previous line
-                 current_line_idx -= 1
-                 cursor_x = len(lines[current_line_idx])
-        elif key == curses.KEY_RIGHT:
-             if cursor_x < len(current_line):
-                 cursor_x += 1
-             elif current_line_idx < len(lines) - 1: # Move to start of next line
-                 current_line_idx += 1
-                 cursor_x = 0
-        elif key in [4, 7]: # Ctrl+D or Ctrl+G often used for EOF/finish
-             break # Finish editing
-        elif 32 <= key <= 126: # Printable characters
-             lines[current_line_idx] = current_line[:cursor_x] + chr(key) + current_line[cursor_x:]
-             cursor_x += 1
-        elif key == 27: # Check for escape sequences (like arrows, if keypad isn't working)
-            # This requires more complex handling, ignore for now
-            pass
+            lines = None  # Cancel
+            break
+        finished = False
+        stdscr.nodelay(True)
+        while key != -1:
+            # --- Process Input ---
+            current_line = lines[current_line_idx]
+
+            if key in [curses.KEY_ENTER, 10, 13]:  # Newline
+                after_cursor = current_line[cursor_x:]
+                del current_line[cursor_x:]
+                current_line_idx += 1
+                lines.insert(current_line_idx, after_cursor)
+                line_texts[current_line_idx - 1] = None
+                line_texts.insert(current_line_idx, None)
+                cursor_x = 0
+                # The split line and everything below it
+                redraw_from = current_line_idx - 1 if redraw_from is None else min(redraw_from, current_line_idx - 1)
+            elif key in [curses.KEY_BACKSPACE, 127, 8]:  # Backspace
+                if cursor_x > 0:
+                    del current_line[cursor_x-1]
+                    cursor_x -= 1
+                    line_texts[current_line_idx] = None
+                    dirty_lines.add(current_line_idx)
+                elif current_line_idx > 0:  # Backspace at start of line, merge with previous
+                    prev_line = lines[current_line_idx-1]
+                    cursor_x = len(prev_line)  # Move cursor to end of previous line
+                    prev_line.extend(current_line)
+                    del lines[current_line_idx]
+                    del line_texts[current_line_idx]
+                    current_line_idx -= 1
+                    line_texts[current_line_idx] = None
+                    # The merged line and everything below it
+                    redraw_from = current_line_idx if redraw_from is None else min(redraw_from, current_line_idx)
+            elif key == curses.KEY_DC:  # Delete key (may not work on all terminals)
+                if cursor_x < len(current_line):
+                    del current_line[cursor_x]
+                    line_texts[current_line_idx] = None
+                    dirty_lines.add(current_line_idx)
+                # Add logic here to merge with next line if at end of current line
+            elif key == curses.KEY_UP:
+                if current_line_idx > 0:
+                    current_line_idx -= 1
+                    # Try to maintain horizontal position
+                    cursor_x = min(cursor_x, len(lines[current_line_idx]))
+            elif key == curses.KEY_DOWN:
+                if current_line_idx < len(lines) - 1:
+                    current_line_idx += 1
+                    # Try to maintain horizontal position
+                    cursor_x = min(cursor_x, len(lines[current_line_idx]))
+            elif key == curses.KEY_LEFT:
+                if cursor_x > 0:
+                    cursor_x -= 1
+                elif current_line_idx > 0:  # Move to end of previous line
+                    current_line_idx -= 1
+                    cursor_x = len(lines[current_line_idx])
+            elif key == curses.KEY_RIGHT:
+                if cursor_x < len(current_line):
+                    cursor_x += 1
+                elif current_line_idx < len(lines) - 1:  # Move to start of next line
+                    current_line_idx += 1
+                    cursor_x = 0
+            elif key in [4, 7]:  # Ctrl+D or Ctrl+G often used for EOF/finish
+                finished = True  # Finish editing
+                break
+            elif key == curses.KEY_RESIZE:
+                _wrap_first.cache_clear()  # Segments cached for the old width won't be hit again
+                max_y, max_x = stdscr.getmaxyx()
+                edit_win_h = max(1, max_y - edit_win_y - 1)
+                edit_win_w = max(1, max_x - x_start - 2)
+                drawn_rows = [None] * edit_win_h  # The terminal may have reflowed: draw every row
+                redraw_from = top_line_idx  # Repaint everything at the new size
+            elif 32 <= key <= 126:  # Printable characters
+                current_line.insert(cursor_x, chr(key))
+                cursor_x += 1
+                line_texts[current_line_idx] = None
+                dirty_lines.add(current_line_idx)
+            elif key == 27:  # Check for escape sequences (like arrows, if keypad isn't working)
+                # This requires more complex handling, ignore for now
+                pass
             
-        # --- Adjust Scroll ---
-        if current_line_idx < top_line_idx:
-             top_line_idx = current_line_idx
-        elif current_line_idx >= top_line_idx + edit_win_h:
-             top_line_idx = current_line_idx - edit_win_h + 1
-             
-    curses.curs_set(0) # Hide cursor
+            # --- Adjust Scroll ---
+            if current_line_idx < top_line_idx:
+                top_line_idx = current_line_idx
+                redraw_from = top_line_idx  # Every visible row moved
+            elif current_line_idx >= top_line_idx + edit_win_h:
+                top_line_idx = current_line_idx - edit_win_h + 1
+                redraw_from = top_line_idx
+
+            try:
+                key = stdscr.getch()  # -1 once the queue is empty
+            except KeyboardInterrupt:
+                lines = None  # Cancel
+                finished = True
+                break
+        stdscr.nodelay(False)
+        if finished:
+            break
+
+    curses.curs_set(0)  # Hide cursor
     # Clear the editing area
-    for i in range(edit_win_h + 2): # Include prompt lines
+    for i in range(edit_win_h + 2):  # Include prompt lines
         stdscr.move(y_start + i, x_start)
         stdscr.clrtoeol()
-    stdscr.refresh()
+    stdscr.noutrefresh()  # Sent with whatever the caller draws next
 
-    return lines
+    if lines is None:
+        return None
+    return [text if text is not None else "".join(line) for line, text in zip(lines, line_texts)]
 
 
-def display_menu(stdscr, menu_options, active_option):
-    """Displays the main menu."""
-    max_y, max_x = stdscr.getmaxyx()
+def display_menu(stdscr, active_option, screen_size=None):
+    """Displays the main menu. screen_size is the caller's cached stdscr.getmaxyx(), if it has one."""
+    screen_size = screen_size or stdscr.getmaxyx()
+    max_y, max_x = screen_size
     header_height = len(SKULL_HEADER)
     menu_start_y = header_height + 3 # Leave space below header
 
-    if menu_start_y + len(menu_options) >= max_y:
+    if menu_start_y + len(MENU_OPTIONS) >= max_y:
          # Handle case where menu doesn't fit (basic version)
-         stdscr.addstr(menu_start_y, 1, "Terminal too small!", curses.color_pair(COLOR_PAIR_ERROR))
+         stdscr.addstr(menu_start_y, 1, "Terminal too small!", ATTR[COLOR_PAIR_ERROR])
          return
 
-    for i, option in enumerate(menu_options):
-        y = menu_start_y + i
-        x = 5 # Indent menu items
-        style = curses.A_NORMAL
-        color_pair = COLOR_PAIR_MENU_INACTIVE
-        prefix = "  "
-        if i == active_option:
-            style = curses.A_BOLD | curses.A_REVERSE
-            color_pair = COLOR_PAIR_MENU_ACTIVE
-            prefix = "-> " + random.choice(SPOOKY_EMOJIS) # Spooky indicator
-
-        display_text = f"{prefix} {option}"[:max_x-x-1] # Truncate if needed
+    for i in range(len(MENU_OPTIONS)):
+        redraw_menu_row(stdscr, i, highlighted=(i == active_option), screen_size=screen_size)
+
+def redraw_menu_row(stdscr, index, highlighted, screen_size):
+    """Draws one main menu row, so moving the selection only rewrites two lines."""
+    max_y, max_x = screen_size # (max_y, max_x), cached by the caller
+    menu_start_y = len(SKULL_HEADER) + 3 # Leave space below header
+    if menu_start_y + len(MENU_OPTIONS) >= max_y:
+        return # display_menu shows "Terminal too small!" instead
+
+    y = menu_start_y + index
+    x = 5 # Indent menu items
+    plain, after_glyph = _MENU_RENDER[index]
+    if highlighted:
+        if index != _menu_glyph["option"]:
+            _menu_glyph["option"] = index
+            _menu_glyph["emoji"] = next(_emoji_iter)
+        attr = ATTR["menu_active"]
+        display_text = "-> " + _menu_glyph["emoji"] + after_glyph # Spooky indicator
+    else:
+        attr = ATTR["menu_inactive"]
+        display_text = plain # ASCII bytes, so slicing and len() below still count columns
+    display_text = display_text[:max_x-x-1] # Truncate if needed
 
-        try:
-            stdscr.attron(curses.color_pair(color_pair) | style)
-            stdscr.addstr(y, x, display_text)
-            stdscr.attroff(curses.color_pair(color_pair) | style)
-            # Clear rest of the line
-            stdscr.addstr(y, x + len(display_text), " " * (max_x - x - len(display_text) -1))
-        except curses.error:
-            pass # Ignore writing errors at edges
+    try:
+        stdscr.addstr(y, x, display_text, attr)
+        # Clear rest of the line
+        stdscr.addstr(y, x + len(display_text), " " * (max_x - x - len(display_text) -1))
+    except curses.error:
+        pass # Ignore writing errors at edges
 
 # --- Core Application Logic ---
 
@@ -445,8 +968,7 @@ def write_new_entry(stdscr, encryption_key):
     input_x = 2
 
     try:
-        stdscr.addstr(prompt_y, input_x, "💀 Writing a New Zecret... 💀", curses.color_pair(COLOR_PAIR_INFO) | curses.A_BOLD)
-        stdscr.refresh()
+        stdscr.addstr(prompt_y, input_x, "💀 Writing a New Zecret... 💀", ATTR[COLOR_PAIR_INFO] | curses.A_BOLD)
         
         title = get_string_input(stdscr, prompt_y + 2, input_x, "Title: ", max_len=80)
         if title is None: # User cancelled
@@ -455,50 +977,38 @@ def write_new_entry(stdscr, encryption_key):
 
         if not title: title = "Untitled Zecret" # Default title
 
-        draw_message(stdscr, "Enter content below.", prompt_y + 4, COLOR_PAIR_INFO)
-        stdscr.refresh()
-        time.sleep(0.5) # Dramatic pause
+        if ANIMATIONS_ENABLED:
+            _spooky_animate(stdscr, prompt_y + 4, ["Enter content below."]) # Shown now, for a short pause
+        else:
+            draw_message(stdscr, "Enter content below.", prompt_y + 4, COLOR_PAIR_INFO, refresh=False) # The editor's first frame sends it
 
         content_lines = get_multiline_input(stdscr, prompt_y + 5, input_x, "Content:")
         if content_lines is None: # User cancelled
             draw_message(stdscr, "Entry cancelled.", max_y - 2, COLOR_PAIR_INFO, delay=1.5)
             return
         
-        content = "\n".join(content_lines)
-        
-        if not content.strip():
+        if not any(line.strip() for line in content_lines):
              draw_message(stdscr, "Entry has no content. Saving cancelled.", max_y - 2, COLOR_PAIR_ERROR, delay=2)
              return
 
         # Combine title and content (with a separator for easy parsing on read)
-        full_entry_data = f"TITLE:{title}\n--CONTENT--\n{content}"
+        full_entry_data = _entry_payload(title, content_lines)
 
-        # --- Animation: Saving ---
-        draw_message(stdscr, "Encrypting your Zecret...", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-        stdscr.refresh()
-        time.sleep(0.8)
-        # --- End Animation ---
-
-        encrypted_content = encrypt_data(full_entry_data, encryption_key)
+        # --- Animation: Saving (plays while the entry is encrypted) ---
+        frames = ["Encrypting your Zecret..."] + [f"Saving to the crypt{'.' * (i+1)}" for i in range(3)]
+        encrypted_content = _run_with_animation(stdscr, max_y - 3, frames, encrypt_data, full_entry_data, encryption_key)
         if not encrypted_content:
             draw_message(stdscr, "Encryption failed! Entry not saved.", max_y - 2, COLOR_PAIR_ERROR, delay=3)
             return
 
-        # --- Animation: Saving ---
-        for i in range(3):
-             draw_message(stdscr, f"Saving to the crypt{'.' * (i+1)}", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-             stdscr.refresh()
-             time.sleep(0.4)
-        # --- End Animation ---
-
         # Generate filename
         now = datetime.datetime.now()
-        filename = now.strftime(f"%Y%m%d_%H%M%S_{random.randint(100,999)}{ENTRY_EXTENSION}")
+        filename = now.strftime(f"%Y%m%d_%H%M%S_{_sysrand.randrange(100, 1000)}{ENTRY_EXTENSION}")
         filepath = os.path.join(NOTES_DIR, filename)
 
         try:
-            with open(filepath, "wb") as f:
-                f.write(encrypted_content)
+            _write_all(filepath, encrypted_content)
+            _remember_note(filename, title, encryption_key)
             draw_message(stdscr, f"Zecret '{filename}' saved! 👻", max_y - 2, COLOR_PAIR_SUCCESS, delay=2)
         except IOError as e:
             draw_message(stdscr, f"Error saving file: {e}", max_y - 2, COLOR_PAIR_ERROR, delay=3)
@@ -511,7 +1021,7 @@ def write_new_entry(stdscr, encryption_key):
 def select_and_read_entry(stdscr, encryption_key, edit_mode=False):
     """Allows selecting a note and reads/displays it (or prepares for edit)."""
     max_y, max_x = stdscr.getmaxyx()
-    notes = get_sorted_notes()
+    notes = get_sorted_notes(encryption_key)
 
     if not notes:
         draw_message(stdscr, "No Zecrets found in the crypt! 🕸️", max_y - 2, COLOR_PAIR_INFO, delay=2)
@@ -531,34 +1041,30 @@ def select_and_read_entry(stdscr, encryption_key, edit_mode=False):
     action_verb = "Edit" if edit_mode else "Read"
     
     while True:
-        clear_screen(stdscr)
+        stdscr.erase() # Unlike clear(), lets curses send only the changed cells
         draw_header(stdscr)
         
         prompt = f"Select a Zecret to {action_verb} (Use ↑↓, Enter to select, Esc/Q to cancel):"
         try:
-             stdscr.addstr(list_y_start, 2, prompt, curses.color_pair(COLOR_PAIR_INFO))
+             stdscr.addstr(list_y_start, 2, prompt, ATTR[COLOR_PAIR_INFO])
         except curses.error: pass
 
         # Draw the list portion
         for i in range(list_height):
              idx = list_offset + i
              if idx < len(notes):
-                 note_name = notes[idx]
+                 note_name, note_title = notes[idx]
                  prefix = "  "
-                 style = curses.A_NORMAL
-                 color = COLOR_PAIR_MENU_INACTIVE
+                 attr = ATTR["menu_inactive"]
                  
                  if idx == active_option:
                      prefix = "->💀"
-                     style = curses.A_BOLD | curses.A_REVERSE
-                     color = COLOR_PAIR_MENU_ACTIVE
+                     attr = ATTR["menu_active"]
                  
-                 display_text = f"{prefix} {note_name}"[:max_x - 4] # Truncate
+                 display_text = f"{prefix} {note_title or note_name}"[:max_x - 4] # Truncate
                  
                  try:
-                    stdscr.attron(curses.color_pair(color) | style)
-                    stdscr.addstr(list_y_start + 2 + i, 3, display_text) # Start list below prompt
-                    stdscr.attroff(curses.color_pair(color) | style)
+                    stdscr.addstr(list_y_start + 2 + i, 3, display_text, attr) # Start list below prompt
                     # Clear rest of line
                     stdscr.addstr(list_y_start + 2 + i, 3 + len(display_text), " " * (max_x - 3 - len(display_text) - 1))
                  except curses.error: pass
@@ -569,13 +1075,14 @@ def select_and_read_entry(stdscr, encryption_key, edit_mode=False):
                  
         # Display scroll indicators if needed
         if list_offset > 0:
-            try: stdscr.addstr(list_y_start + 1, max_x - 5, "↑ More", curses.color_pair(COLOR_PAIR_INFO))
+            try: stdscr.addstr(list_y_start + 1, max_x - 5, "↑ More", ATTR[COLOR_PAIR_INFO])
             except curses.error: pass
         if list_offset + list_height < len(notes):
-             try: stdscr.addstr(list_y_start + list_height + 2, max_x - 5, "↓ More", curses.color_pair(COLOR_PAIR_INFO))
+             try: stdscr.addstr(list_y_start + list_height + 2, max_x - 5, "↓ More", ATTR[COLOR_PAIR_INFO])
              except curses.error: pass
              
-        stdscr.refresh()
+        stdscr.noutrefresh()
+        _doupdate() # One terminal update per keypress
 
         key = stdscr.getch()
 
@@ -590,18 +1097,16 @@ def select_and_read_entry(stdscr, encryption_key, edit_mode=False):
                 if active_option >= list_offset + list_height:
                     list_offset += 1 # Scroll down
         elif key in [curses.KEY_ENTER, 10, 13]:
-            selected_note = notes[active_option]
+            selected_note = notes[active_option][0]
             filepath = os.path.join(NOTES_DIR, selected_note)
             
             # --- Animation: Decrypting ---
-            draw_message(stdscr, f"Unlocking {selected_note}...", max_y - 2, COLOR_PAIR_INFO, spooky=True)
-            stdscr.refresh()
-            time.sleep(0.7)
+            if ANIMATIONS_ENABLED:
+                _spooky_animate(stdscr, max_y - 2, [f"Unlocking {selected_note}..."])
             # --- End Animation ---
 
             try:
-                with open(filepath, "rb") as f:
-                    encrypted_data = f.read()
+                encrypted_data = _read_all(filepath)
                 
                 decrypted_full_entry = decrypt_data(encrypted_data, encryption_key)
 
@@ -626,7 +1131,7 @@ def select_and_read_entry(stdscr, encryption_key, edit_mode=False):
 
             except FileNotFoundError:
                 draw_message(stdscr, "File not found! Maybe deleted?", max_y - 2, COLOR_PAIR_ERROR, delay=2)
-                notes = get_sorted_notes() # Refresh list
+                notes = get_sorted_notes(encryption_key) # Refresh list
                 if not notes: return False
                 active_option = min(active_option, len(notes)-1)
                 list_offset = min(list_offset, max(0, len(notes)-list_height))
@@ -646,7 +1151,7 @@ def display_note_content(stdscr, title, content, note_name):
     display_offset = 0 # Top line index for scrolling
     
     while True:
-        clear_screen(stdscr)
+        stdscr.erase() # Unlike clear(), lets curses send only the changed cells
         draw_header(stdscr)
         
         header_y = len(SKULL_HEADER) + 2
@@ -657,26 +1162,19 @@ def display_note_content(stdscr, title, content, note_name):
         title_str = f"🦇 {title} ({note_name}) 🦇"[:max_x-4]
         title_x = max(1, (max_x - len(title_str)) // 2)
         try:
-             stdscr.attron(curses.color_pair(COLOR_PAIR_HEADER) | curses.A_BOLD)
-             stdscr.addstr(header_y, title_x, title_str)
-             stdscr.attroff(curses.color_pair(COLOR_PAIR_HEADER) | curses.A_BOLD)
+             stdscr.addstr(header_y, title_x, title_str, ATTR[COLOR_PAIR_HEADER] | curses.A_BOLD)
         except curses.error: pass
 
         if content_height <= 0:
              draw_message(stdscr, "Terminal too small to display content!", max_y-2, COLOR_PAIR_ERROR, delay=2)
-             time.sleep(1)
              return
 
         # Display Content Lines
         for i in range(content_height):
             line_idx = display_offset + i
             if line_idx < len(lines):
-                # Basic wrapping for display
-                wrapped_lines = textwrap.wrap(lines[line_idx], width=max_x - 4)
-                if not wrapped_lines: wrapped_lines=[""] # Handle empty lines
-                
                 # Only display the first part of wrapped line for simplicity
-                display_line = wrapped_lines[0][:max_x-4]
+                display_line = _wrap_first(lines[line_idx], max_x - 4)[0][:max_x-4]
                 
                 try:
                     stdscr.addstr(content_y_start + i, 2, display_line)
@@ -690,20 +1188,19 @@ def display_note_content(stdscr, title, content, note_name):
         footer_y = max_y - 1
         instructions = "Use ↑↓ or PgUp/PgDn to Scroll | Press Q or Esc to Return"
         try:
-             stdscr.attron(curses.color_pair(COLOR_PAIR_INFO) | curses.A_REVERSE)
-             stdscr.addstr(footer_y, 0, instructions.ljust(max_x))
-             stdscr.attroff(curses.color_pair(COLOR_PAIR_INFO) | curses.A_REVERSE)
+             stdscr.addstr(footer_y, 0, instructions.ljust(max_x), ATTR[COLOR_PAIR_INFO] | curses.A_REVERSE)
         except curses.error: pass
         
         # Scroll indicators
         if display_offset > 0:
-            try: stdscr.addstr(content_y_start, max_x - 3, "↑↑", curses.color_pair(COLOR_PAIR_INFO))
+            try: stdscr.addstr(content_y_start, max_x - 3, "↑↑", ATTR[COLOR_PAIR_INFO])
             except curses.error: pass
         if display_offset + content_height < len(lines):
-             try: stdscr.addstr(content_y_start + content_height - 1, max_x - 3, "↓↓", curses.color_pair(COLOR_PAIR_INFO))
+             try: stdscr.addstr(content_y_start + content_height - 1, max_x - 3, "↓↓", ATTR[COLOR_PAIR_INFO])
              except curses.error: pass
              
-        stdscr.refresh()
+        stdscr.noutrefresh()
+        _doupdate() # One terminal update per keypress
 
         key = stdscr.getch()
 
@@ -725,113 +1222,6 @@ def display_note_content(stdscr, title, content, note_name):
             break # Exit display
 
 
-# def edit_entry(stdscr, encryption_key):
-    """Handles selecting, editing, and re-saving an entry."""
-    max_y, max_x = stdscr.getmaxyx()
-
-    # Select the note first
-    selection_result = select_and_read_entry(stdscr, encryption_key, edit_mode=True)
-
-    if selection_result is None:
-        # User cancelled selection or an error occurred during selection/decryption
-        # Message should have been displayed by select_and_read_entry
-        return
-
-    selected_note_file, old_title, old_content = selection_result
-    filepath = os.path.join(NOTES_DIR, selected_note_file)
-
-    clear_screen(stdscr)
-    draw_header(stdscr)
-    prompt_y = len(SKULL_HEADER) + 2
-    input_x = 2
-
-    try:
-        stdscr.addstr(prompt_y, input_x, f"💀 Editing Zecret: {selected_note_file} 💀", curses.color_pair(COLOR_PAIR_INFO) | curses.A_BOLD)
-        
-        # --- Offer to Edit Title ---
-        stdscr.addstr(prompt_y + 2, input_x, f"Current Title: {old_title}")
-        new_title = get_string_input(stdscr, prompt_y + 3, input_x, "New Title (Enter to keep current): ", max_len=80)
-        
-        if new_title is None: # Cancelled during title input
-             draw_message(stdscr, "Edit cancelled.", max_y - 2, COLOR_PAIR_INFO, delay=1.5)
-             return
-        elif not new_title:
-             new_title = old_title # Keep the old title
-        
-        # --- Edit Content ---
-        draw_message(stdscr, "Loading content for editing...", prompt_y + 5, COLOR_PAIR_INFO)
-        stdscr.refresh()
-        time.sleep(0.5)
-        
-        # Pre-populate the editor with existing content
-        initial_lines = old_content.splitlines()
-        
-        # Need to re-implement multiline input to accept initial text
-        # For simplicity here, we'll just use the get_multiline_input
-        # You would ideally modify get_multiline_input to take 'initial_lines'
-        # and start the editing session with that text.
-        
-        # Simulating editing: Ask user to re-enter or clear and start new
-        # A real implementation would modify get_multiline_input
-        clear_screen(stdscr) # Clear screen before editor
-        draw_header(stdscr)
-        stdscr.addstr(prompt_y, input_x, f"Editing Content for: {new_title}", curses.color_pair(COLOR_PAIR_INFO) | curses.A_BOLD)
-        
-        # Display old content briefly for reference (optional)
-        # display_note_content(stdscr, "Old Content (Reference)", old_content, "Read Only")
-        # clear_screen(stdscr)
-        # draw_header(stdscr)
-        # stdscr.addstr(prompt_y, input_x, f"Editing Content for: {new_title}", curses.color_pair(COLOR_PAIR_INFO) | curses.A_BOLD)
-        
-        # --- Get New Content ---
-        # Ideally, pass 'initial_lines' to a modified get_multiline_input
-        draw_message(stdscr, "Enter new content below. Old content is NOT pre-filled in this basic version.", prompt_y + 2, COLOR_PAIR_INFO)
-        stdscr.refresh()
-        time.sleep(1) # Give time to read message
-        
-        new_content_lines = get_multiline_input(stdscr, prompt_y + 4, input_x, "New Content:")
-
-        if new_content_lines is None: # User cancelled
-            draw_message(stdscr, "Edit cancelled.", max_y - 2, COLOR_PAIR_INFO, delay=1.5)
-            return
-
-        new_content = "\n".join(new_content_lines)
-
-        if not new_content.strip():
-             draw_message(stdscr, "New content is empty. Edit cancelled.", max_y - 2, COLOR_PAIR_ERROR, delay=2)
-             return
-
-        # Combine title and content
-        full_entry_data = f"TITLE:{new_title}\n--CONTENT--\n{new_content}"
-
-        # --- Animation: Saving ---
-        draw_message(stdscr, "Encrypting your updated Zecret...", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-        stdscr.refresh()
-        time.sleep(0.8)
-        # --- End Animation ---
-
-        encrypted_content = encrypt_data(full_entry_data, encryption_key)
-        if not encrypted_content:
-            draw_message(stdscr, "Encryption failed! Edit not saved.", max_y - 2, COLOR_PAIR_ERROR, delay=3)
-            return
-
-        # --- Animation: Saving ---
-        for i in range(3):
-             draw_message(stdscr, f"Updating the crypt{'.' * (i+1)}", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-             stdscr.refresh()
-             time.sleep(0.4)
-        # --- End Animation ---
-
-        try:
-            # Overwrite the original file
-            with open(filepath, "wb") as f:
-                f.write(encrypted_content)
-            draw_message(stdscr, f"Zecret '{selected_note_file}' updated! ✨", max_y - 2, COLOR_PAIR_SUCCESS, delay=2)
-        except IOError as e:
-            draw_message(stdscr, f"Error saving updated file: {e}", max_y - 2, COLOR_PAIR_ERROR, delay=3)
-
-    except Exception as e:
-        draw_message(stdscr, f"An error occurred during editing: {e}", max_y - 2, COLOR_PAIR_ERROR, delay=3)
 def edit_entry(stdscr, encryption_key):
     """Handles selecting, editing, and re-saving an entry."""
     max_y, max_x = stdscr.getmaxyx()
@@ -852,7 +1242,7 @@ def edit_entry(stdscr, encryption_key):
     input_x = 2
 
     try:
-        stdscr.addstr(prompt_y, input_x, f"💀 Editing Zecret: {selected_note_file} 💀", curses.color_pair(COLOR_PAIR_INFO) | curses.A_BOLD)
+        stdscr.addstr(prompt_y, input_x, f"💀 Editing Zecret: {selected_note_file} 💀", ATTR[COLOR_PAIR_INFO] | curses.A_BOLD)
         
         # --- Offer to Edit Title ---
         stdscr.addstr(prompt_y + 2, input_x, f"Current Title: {old_title}")
@@ -869,20 +1259,18 @@ def edit_entry(stdscr, encryption_key):
         edit_mode_choice = 0
         
         # Display edit mode options
+        option_width = max_x - input_x - 1
         while True:
             for i, option in enumerate(edit_options):
                 y = prompt_y + 5 + i
-                style = curses.A_BOLD | curses.A_REVERSE if i == edit_mode_choice else curses.A_NORMAL
-                color = COLOR_PAIR_MENU_ACTIVE if i == edit_mode_choice else COLOR_PAIR_MENU_INACTIVE
-                prefix = "-> " if i == edit_mode_choice else "   "
+                if i == edit_mode_choice:
+                    prefix, attr = "-> ", ATTR["menu_active"]
+                else:
+                    prefix, attr = "   ", ATTR["menu_inactive"]
                 
-                stdscr.move(y, input_x)
-                stdscr.clrtoeol()
-                stdscr.attron(curses.color_pair(color) | style)
-                stdscr.addstr(y, input_x, f"{prefix}{option}")
-                stdscr.attroff(curses.color_pair(color) | style)
+                # One padded write replaces move + clrtoeol + addstr
+                stdscr.addnstr(y, input_x, f"{prefix}{option}".ljust(option_width), option_width, attr)
             
-            stdscr.refresh()
             key = stdscr.getch()
             
             if key == curses.KEY_UP and edit_mode_choice > 0:
@@ -926,35 +1314,29 @@ def edit_entry(stdscr, encryption_key):
 
         new_content = "\n".join(new_content_lines)
 
+        # Same title and an untouched editor (or identical text): nothing to re-encrypt or rewrite
+        if new_title == old_title and (new_content_lines == initial_lines or new_content == old_content):
+            draw_message(stdscr, "No changes made. Zecret left untouched.", max_y - 2, COLOR_PAIR_INFO, delay=1.5)
+            return
+
         if not new_content.strip():
             draw_message(stdscr, "New content is empty. Edit cancelled.", max_y - 2, COLOR_PAIR_ERROR, delay=2)
             return
 
         # Combine title and content
-        full_entry_data = f"TITLE:{new_title}\n--CONTENT--\n{new_content}"
+        full_entry_data = _entry_payload(new_title, new_content_lines)
 
-        # --- Animation: Saving ---
-        draw_message(stdscr, "Encrypting your updated Zecret...", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-        stdscr.refresh()
-        time.sleep(0.8)
-        # --- End Animation ---
-
-        encrypted_content = encrypt_data(full_entry_data, encryption_key)
+        # --- Animation: Saving (plays while the entry is encrypted) ---
+        frames = ["Encrypting your updated Zecret..."] + [f"Updating the crypt{'.' * (i+1)}" for i in range(3)]
+        encrypted_content = _run_with_animation(stdscr, max_y - 3, frames, encrypt_data, full_entry_data, encryption_key)
         if not encrypted_content:
             draw_message(stdscr, "Encryption failed! Edit not saved.", max_y - 2, COLOR_PAIR_ERROR, delay=3)
             return
 
-        # --- Animation: Saving ---
-        for i in range(3):
-            draw_message(stdscr, f"Updating the crypt{'.' * (i+1)}", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-            stdscr.refresh()
-            time.sleep(0.4)
-        # --- End Animation ---
-
         try:
-            # Overwrite the original file
-            with open(filepath, "wb") as f:
-                f.write(encrypted_content)
+            # Replace the original file atomically; a failed save leaves the old note intact
+            _atomic_write_bytes(filepath, encrypted_content)
+            _remember_note(selected_note_file, new_title, encryption_key) # Rewritten in place: refresh its title
             draw_message(stdscr, f"Zecret '{selected_note_file}' updated! ✨", max_y - 2, COLOR_PAIR_SUCCESS, delay=2)
         except IOError as e:
             draw_message(stdscr, f"Error saving updated file: {e}", max_y - 2, COLOR_PAIR_ERROR, delay=3)
@@ -965,155 +1347,7 @@ def edit_entry(stdscr, encryption_key):
 
 def get_multiline_input_with_content(stdscr, y_start, x_start, prompt, initial_lines):
     """Gets multi-line input with pre-filled content. Returns a list of lines."""
-    max_y, max_x = stdscr.getmaxyx()
-    lines = initial_lines.copy() if initial_lines else [""]
-    current_line_idx = 0
-    cursor_x = 0  # Position within the current line
-    
-    stdscr.attron(curses.color_pair(COLOR_PAIR_INPUT))
-    stdscr.addstr(y_start, x_start, prompt)
-    stdscr.addstr(y_start + 1, x_start, "(Press Ctrl+D or Ctrl+G to finish)")
-    stdscr.attroff(curses.color_pair(COLOR_PAIR_INPUT))
-    
-    curses.curs_set(1)  # Show cursor
-    
-    edit_win_y = y_start + 2
-    edit_win_h = max_y - edit_win_y - 1  # Leave space at bottom
-    edit_win_w = max_x - x_start - 2
-    
-    if edit_win_h <= 0 or edit_win_w <= 0:
-        return None  # Not enough space
-
-    # Keep track of top line displayed for scrolling
-    top_line_idx = 0 
-    
-    while True:
-        # --- Redraw the editing area ---
-        stdscr.move(edit_win_y, x_start)
-        for i in range(edit_win_h):
-            stdscr.clrtoeol()  # Clear line before writing
-            line_idx_to_draw = top_line_idx + i
-            if line_idx_to_draw < len(lines):
-                # Simple wrapping for display
-                wrapped_lines = textwrap.wrap(lines[line_idx_to_draw], width=edit_win_w)
-                if not wrapped_lines:  # Handle empty line case after wrap
-                    wrapped_lines = [""] 
-                # Display only the relevant part if wrapped (this part is simplified)
-                # For simplicity, just show the first wrapped segment or indicate more
-                display_line = wrapped_lines[0]
-                if len(wrapped_lines) > 1:
-                    display_line = display_line[:-3] + "..."  # Indicate more content
-                     
-                # Truncate if still too long (shouldn't happen with wrap)
-                display_line = display_line[:edit_win_w] 
-                 
-                try:
-                    stdscr.addstr(edit_win_y + i, x_start, display_line)
-                except curses.error:
-                    pass  # Ignore drawing errors at edges
-            else:
-                # Clear lines below content
-                stdscr.move(edit_win_y + i, x_start)
-                stdscr.clrtoeol()
-                 
-        # --- Place cursor ---
-        # Calculate cursor position based on current line and potential wrapping
-        current_line_content = lines[current_line_idx]
-        cursor_y_in_win = (current_line_idx - top_line_idx) 
-        # Simplified cursor X - doesn't handle wrapping accurately
-        cursor_x_in_win = cursor_x 
-        
-        # Clamp cursor position within window bounds
-        cursor_y_in_win = max(0, min(edit_win_h - 1, cursor_y_in_win))
-        cursor_x_in_win = max(0, min(edit_win_w - 1, cursor_x_in_win))
-
-        try:
-            stdscr.move(edit_win_y + cursor_y_in_win, x_start + cursor_x_in_win)
-        except curses.error:
-            # If cursor move fails, try moving to start of line
-            try: 
-                stdscr.move(edit_win_y + cursor_y_in_win, x_start)
-            except curses.error: 
-                pass  # Give up if even that fails
-
-        stdscr.refresh()
-        
-        # --- Get Input ---
-        try:
-            key = stdscr.getch()
-        except KeyboardInterrupt:
-            lines = None  # Cancel
-            break
-             
-        # --- Process Input ---
-        current_line = lines[current_line_idx]
-
-        if key in [curses.KEY_ENTER, 10, 13]:  # Newline
-            before_cursor = current_line[:cursor_x]
-            after_cursor = current_line[cursor_x:]
-            lines[current_line_idx] = before_cursor
-            current_line_idx += 1
-            lines.insert(current_line_idx, after_cursor)
-            cursor_x = 0
-        elif key in [curses.KEY_BACKSPACE, 127, 8]:  # Backspace
-            if cursor_x > 0:
-                lines[current_line_idx] = current_line[:cursor_x-1] + current_line[cursor_x:]
-                cursor_x -= 1
-            elif current_line_idx > 0:  # Backspace at start of line, merge with previous
-                prev_line = lines[current_line_idx-1]
-                cursor_x = len(prev_line)  # Move cursor to end of previous line
-                lines[current_line_idx-1] = prev_line + current_line
-                del lines[current_line_idx]
-                current_line_idx -= 1
-        elif key == curses.KEY_DC:  # Delete key (may not work on all terminals)
-            if cursor_x < len(current_line):
-                lines[current_line_idx] = current_line[:cursor_x] + current_line[cursor_x+1:]
-            # Add logic here to merge with next line if at end of current line
-        elif key == curses.KEY_UP:
-            if current_line_idx > 0:
-                current_line_idx -= 1
-                # Try to maintain horizontal position
-                cursor_x = min(cursor_x, len(lines[current_line_idx]))
-        elif key == curses.KEY_DOWN:
-            if current_line_idx < len(lines) - 1:
-                current_line_idx += 1
-                # Try to maintain horizontal position
-                cursor_x = min(cursor_x, len(lines[current_line_idx]))
-        elif key == curses.KEY_LEFT:
-            if cursor_x > 0:
-                cursor_x -= 1
-            elif current_line_idx > 0:  # Move to end of previous line
-                current_line_idx -= 1
-                cursor_x = len(lines[current_line_idx])
-        elif key == curses.KEY_RIGHT:
-            if cursor_x < len(current_line):
-                cursor_x += 1
-            elif current_line_idx < len(lines) - 1:  # Move to start of next line
-                current_line_idx += 1
-                cursor_x = 0
-        elif key in [4, 7]:  # Ctrl+D or Ctrl+G often used for EOF/finish
-            break  # Finish editing
-        elif 32 <= key <= 126:  # Printable characters
-            lines[current_line_idx] = current_line[:cursor_x] + chr(key) + current_line[cursor_x:]
-            cursor_x += 1
-        elif key == 27:  # Check for escape sequences (like arrows, if keypad isn't working)
-            # This requires more complex handling, ignore for now
-            pass
-            
-        # --- Adjust Scroll ---
-        if current_line_idx < top_line_idx:
-            top_line_idx = current_line_idx
-        elif current_line_idx >= top_line_idx + edit_win_h:
-            top_line_idx = current_line_idx - edit_win_h + 1
-             
-    curses.curs_set(0)  # Hide cursor
-    # Clear the editing area
-    for i in range(edit_win_h + 2):  # Include prompt lines
-        stdscr.move(y_start + i, x_start)
-        stdscr.clrtoeol()
-    stdscr.refresh()
-
-    return lines
+    return get_multiline_input(stdscr, y_start, x_start, prompt, initial_lines=initial_lines)
 
 def import_entry(stdscr, encryption_key):
     """Imports an existing encrypted .rz file (assuming current key)."""
@@ -1124,8 +1358,7 @@ def import_entry(stdscr, encryption_key):
     input_x = 2
 
     try:
-        stdscr.addstr(prompt_y, input_x, "🔮 Import Encrypted Zecret (.rz file) 🔮", curses.color_pair(COLOR_PAIR_INFO) | curses.A_BOLD)
-        stdscr.refresh()
+        stdscr.addstr(prompt_y, input_x, "🔮 Import Encrypted Zecret (.rz file) 🔮", ATTR[COLOR_PAIR_INFO] | curses.A_BOLD)
 
         import_path = get_string_input(stdscr, prompt_y + 2, input_x, "Path to .rz file: ", max_len=200)
 
@@ -1144,55 +1377,46 @@ def import_entry(stdscr, encryption_key):
              return
 
         # --- Animation: Importing ---
-        draw_message(stdscr, f"Attempting to read {os.path.basename(import_path)}...", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-        stdscr.refresh()
-        time.sleep(1.0)
+        if ANIMATIONS_ENABLED:
+            _spooky_animate(stdscr, max_y - 3, [f"Attempting to read {os.path.basename(import_path)}..."])
         # --- End Animation ---
 
         try:
             with open(import_path, "rb") as f:
                 encrypted_data = f.read()
 
-            # Try decrypting with the *current* key to validate
-            decrypted_check = decrypt_data(encrypted_data, encryption_key)
-
-            if decrypted_check is None:
+            # Validate against the *current* key; the signature check is enough since the
+            # ciphertext is copied as is and the plaintext would only be thrown away
+            if not verify_token(encrypted_data, encryption_key):
                  draw_message(stdscr, "Decryption failed! File might be corrupt or encrypted with a different password.", max_y - 2, COLOR_PAIR_ERROR, delay=3.5)
                  return
 
             # --- Animation: Copying ---
-            draw_message(stdscr, "Zecret unlocked! Copying to crypt...", max_y - 3, COLOR_PAIR_INFO, spooky=True)
-            stdscr.refresh()
-            time.sleep(1.0)
+            if ANIMATIONS_ENABLED:
+                _spooky_animate(stdscr, max_y - 3, ["Zecret unlocked! Copying to crypt..."])
             # --- End Animation ---
 
             # Create a unique name in the destination directory
             base_name = os.path.basename(import_path)
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            # Ensure filename doesn't clash if imported multiple times
-            dest_filename = f"imported_{timestamp}_{base_name}" 
-             # Ensure it still ends with .rz
-            if not dest_filename.lower().endswith(ENTRY_EXTENSION):
-                dest_filename += ENTRY_EXTENSION
-                
-            dest_path = os.path.join(NOTES_DIR, dest_filename)
-            
-            # Avoid overwriting existing files silently
-            counter = 1
-            while os.path.exists(dest_path):
-                 dest_filename = f"imported_{timestamp}_{counter}_{base_name}"
-                 if not dest_filename.lower().endswith(ENTRY_EXTENSION):
-                     dest_filename += ENTRY_EXTENSION
-                 dest_path = os.path.join(NOTES_DIR, dest_filename)
-                 counter += 1
-                 if counter > 100: # Safety break
-                      draw_message(stdscr, "Failed to find unique name for import.", max_y-2, COLOR_PAIR_ERROR, delay=2)
-                      return
-
-
-            # Copy the already read encrypted data
-            with open(dest_path, "wb") as f:
-                 f.write(encrypted_data)
+
+            # Copy the already read encrypted data. Exclusive creation claims the name in the
+            # same call that opens the file, so an existing note is never overwritten
+            for counter in range(101):
+                # Ensure filename doesn't clash if imported multiple times
+                dest_filename = f"imported_{timestamp}_{counter}_{base_name}" if counter else f"imported_{timestamp}_{base_name}"
+                # Ensure it still ends with .rz
+                if not dest_filename.lower().endswith(ENTRY_EXTENSION):
+                    dest_filename += ENTRY_EXTENSION
+                try:
+                    _write_all(os.path.join(NOTES_DIR, dest_filename), encrypted_data, exclusive=True)
+                    break
+                except FileExistsError:
+                    continue
+            else: # Safety break
+                draw_message(stdscr, "Failed to find unique name for import.", max_y-2, COLOR_PAIR_ERROR, delay=2)
+                return
+            _remember_note(dest_filename)
 
             draw_message(stdscr, f"Zecret imported as '{dest_filename}'! ✅", max_y - 2, COLOR_PAIR_SUCCESS, delay=2.5)
 
@@ -1214,11 +1438,16 @@ def change_password(stdscr, old_key):
     prompt_y = len(SKULL_HEADER) + 2
     input_x = 2
 
-    stdscr.addstr(prompt_y, input_x, "🔑 Change Master Password 🔑", curses.color_pair(COLOR_PAIR_INFO) | curses.A_BOLD)
-    stdscr.addstr(prompt_y + 1, input_x, "WARNING: This requires re-encrypting ALL notes!", curses.color_pair(COLOR_PAIR_ERROR))
-    stdscr.refresh()
+    stdscr.addstr(prompt_y, input_x, "🔑 Change Master Password 🔑", ATTR[COLOR_PAIR_INFO] | curses.A_BOLD)
+    stdscr.addstr(prompt_y + 1, input_x, "WARNING: This requires re-encrypting ALL notes!", ATTR[COLOR_PAIR_ERROR])
 
     # 1. Get and Verify Old Password
+    # The stored salt and hash can't change between attempts, so read them once
+    salt, stored_hash = load_password_salt_and_hash()
+    if not salt: # Should not happen if already authenticated, but check
+        draw_message(stdscr, "Error loading password data.", max_y - 2, COLOR_PAIR_ERROR, delay=2)
+        return False, old_key
+
     verified = False
     for attempt in range(3):
          old_password = get_string_input(stdscr, prompt_y + 3 + attempt, input_x, f"Enter OLD Password (Attempt {attempt+1}/3): ", password=True)
@@ -1226,15 +1455,11 @@ def change_password(stdscr, old_key):
              draw_message(stdscr, "Password change cancelled.", max_y - 2, COLOR_PAIR_INFO, delay=1.5)
              return False, old_key # Return indicator + old key
 
-         salt, stored_hash = load_password_salt_and_hash()
-         if not salt: # Should not happen if already authenticated, but check
-             draw_message(stdscr, "Error loading password data.", max_y - 2, COLOR_PAIR_ERROR, delay=2)
-             return False, old_key
-
-         verified, derived_key = verify_password(old_password, salt, stored_hash)
+         verified, derived_key = _run_with_spinner(stdscr, prompt_y + 4 + attempt, input_x, verify_password, old_password, salt, stored_hash)
+         _wipe(old_password)
          if verified:
              # Important: ensure derived_key matches the currently used old_key
-             if derived_key != old_key:
+             if not hmac.compare_digest(derived_key.raw, old_key.raw):
                  # This indicates a serious inconsistency
                   draw_message(stdscr, "CRITICAL ERROR: Key mismatch!", max_y - 2, COLOR_PAIR_ERROR, delay=4)
                   return False, old_key
@@ -1248,11 +1473,7 @@ def change_password(stdscr, old_key):
     if not verified: # Should be caught above, but double check
          return False, old_key
 
-    # Clear password prompts
-    for i in range(4):
-        stdscr.move(prompt_y + 3 + i, 0)
-        stdscr.clrtoeol()
-    stdscr.refresh()
+    _clear_prompt_area(stdscr, prompt_y + 3) # Clear password prompts
 
     # 2. Get New Password
     new_password = None
@@ -1263,103 +1484,89 @@ def change_password(stdscr, old_key):
             return False, old_key
 
         if len(pass1) < 8: # Basic check
+            _wipe(pass1)
             draw_message(stdscr, "Password too short (minimum 8 characters).", prompt_y + 5, COLOR_PAIR_ERROR, delay=2)
-            stdscr.move(prompt_y+3, 0); stdscr.clrtoeol() # Clear first prompt line
-            stdscr.refresh()
+            _clear_prompt_area(stdscr, prompt_y + 3) # Clear the prompt before retrying
             continue
 
         pass2 = get_string_input(stdscr, prompt_y + 4, input_x, "Confirm NEW Password: ", password=True)
         if pass2 is None:
+            _wipe(pass1)
             draw_message(stdscr, "Password change cancelled.", max_y - 2, COLOR_PAIR_INFO, delay=1.5)
             return False, old_key
 
-        if pass1 == pass2:
+        if len(pass1) == len(pass2) and hmac.compare_digest(pass1, pass2):
             new_password = pass1
+            _wipe(pass2)
             break
         else:
+            _wipe(pass1)
+            _wipe(pass2)
             draw_message(stdscr, "Passwords do not match. Try again.", prompt_y + 5, COLOR_PAIR_ERROR, delay=2)
-            # Clear password prompt lines before retry
-            stdscr.move(prompt_y+3, 0); stdscr.clrtoeol()
-            stdscr.move(prompt_y+4, 0); stdscr.clrtoeol()
-            stdscr.refresh()
+            _clear_prompt_area(stdscr, prompt_y + 3) # Clear password prompt lines before retry
 
-    # Clear password prompts
-    for i in range(3):
-        stdscr.move(prompt_y + 3 + i, 0)
-        stdscr.clrtoeol()
-    stdscr.refresh()
+    _clear_prompt_area(stdscr, prompt_y + 3) # Clear password prompts
 
-    # --- Animation: Processing ---
+    # Status stays up while the key is derived
     draw_message(stdscr, "Generating new encryption key...", max_y - 4, COLOR_PAIR_INFO, spooky=True)
-    stdscr.refresh()
-    time.sleep(0.8)
-    # --- End Animation ---
 
     # 3. Save New Password Hash
-    new_salt, new_key = save_password_hash(new_password)
+    new_salt, new_key = _run_with_spinner(stdscr, max_y - 3, input_x, save_password_hash, new_password)
+    _wipe(new_password)
     if not new_salt or not new_key:
         draw_message(stdscr, "ERROR: Failed to save new password hash!", max_y - 2, COLOR_PAIR_ERROR, delay=3)
         # CRITICAL: Password file might be in an inconsistent state.
         # Ideally, should backup old hash before attempting to save new one.
         return False, old_key # Return old key as change failed
 
-    # --- Animation: Re-encrypting ---
     notes = get_sorted_notes()
     total_notes = len(notes)
     draw_message(stdscr, f"Re-encrypting {total_notes} notes with new key. This may take time...", max_y - 4, COLOR_PAIR_INFO, spooky=True)
-    stdscr.refresh()
-    time.sleep(1)
-    # --- End Animation ---
 
     # 4. Re-encrypt all notes
     success_count = 0
     fail_count = 0
     status_y = max_y - 3
 
-    for i, note_file in enumerate(notes):
-        filepath = os.path.join(NOTES_DIR, note_file)
-        
-        # Update status
-        status_msg = f"Processing: {note_file} ({i+1}/{total_notes})"
-        stdscr.move(status_y, 0)
-        stdscr.clrtoeol()
-        try:
-            stdscr.addstr(status_y, 2, status_msg[:max_x-3], curses.color_pair(COLOR_PAIR_INFO))
-        except curses.error: pass
-        stdscr.refresh()
-
-        try:
-            # a. Read encrypted data
-            with open(filepath, "rb") as f:
-                encrypted_data = f.read()
-            
-            # b. Decrypt with OLD key
-            decrypted_content = decrypt_data(encrypted_data, old_key)
-            if decrypted_content is None:
-                # Skip this file, count as failure
-                fail_count += 1
-                # Log this? Display later?
-                continue # Move to next file
+    # Each note is independent, so spread the read -> decrypt -> encrypt -> write work over processes.
+    # One worker more than there are cores: while a worker waits on its disk write, another's
+    # crypto keeps every core busy, so writes overlap encryption even on a single-core machine
+    rekey = functools.partial(_rekey_file, old_key=old_key, new_key=new_key)
+    try:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max(1, min((os.cpu_count() or 1) + 1, total_notes)))
+    except (OSError, NotImplementedError): # No working multiprocessing on this platform
+        pool = concurrent.futures.ThreadPoolExecutor()
 
-            # c. Encrypt with NEW key
-            new_encrypted_data = encrypt_data(decrypted_content, new_key)
-            if new_encrypted_data is None:
+    with pool:
+        futures = {pool.submit(rekey, os.path.join(NOTES_DIR, note_file)): note_file for note_file in notes}
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            try:
+                rekeyed = future.result()
+            except Exception: # The pool itself broke (e.g. a worker was killed); redo this note here
+                note_path = os.path.join(NOTES_DIR, futures[future])
+                rekeyed = rekey(note_path)
+                if not rekeyed: # The dead worker may have replaced this note already
+                    try:
+                        rekeyed = verify_token(_read_all(note_path), new_key)
+                    except OSError:
+                        pass
+            if rekeyed:
+                success_count += 1
+            else:
                 fail_count += 1
-                continue # Move to next file
 
-            # d. Overwrite file with newly encrypted data
-            with open(filepath, "wb") as f:
-                f.write(new_encrypted_data)
-            
-            success_count += 1
-            # Optional small delay to show progress
-            # time.sleep(0.05) 
+            # Update status
+            status_msg = f"Processing: {futures[future]} ({i+1}/{total_notes})"
+            stdscr.move(status_y, 0)
+            stdscr.clrtoeol()
+            try:
+                stdscr.addstr(status_y, 2, status_msg[:max_x-3], ATTR[COLOR_PAIR_INFO])
+            except curses.error: pass
+            stdscr.noutrefresh()
+            _doupdate() # One terminal update per note
 
-        except Exception as e:
-            # Log error for this specific file
-            fail_count += 1
-            # Maybe log 'e' somewhere
-            continue # Move to next file
+    # One directory fsync commits every rename above, instead of one fsync per note
+    _fsync_dir(NOTES_DIR)
 
     # Final status message
     clear_screen(stdscr)
@@ -1398,8 +1605,20 @@ def main(stdscr):
     curses.init_pair(COLOR_PAIR_SUCCESS, curses.COLOR_GREEN, -1)
     curses.init_pair(COLOR_PAIR_INPUT, curses.COLOR_WHITE, -1)
     curses.init_pair(COLOR_PAIR_BORDER, curses.COLOR_MAGENTA, -1) # Example for potential borders
+    # Resolve each pair's attribute once; draw calls then just index ATTR
+    for pair in range(COLOR_PAIR_DEFAULT, COLOR_PAIR_BORDER + 1):
+        ATTR[pair] = curses.color_pair(pair)
+    # Complete attributes for highlighted and plain rows in every menu and list
+    ATTR["menu_active"] = ATTR[COLOR_PAIR_MENU_ACTIVE] | curses.A_BOLD | curses.A_REVERSE
+    ATTR["menu_inactive"] = ATTR[COLOR_PAIR_MENU_INACTIVE] | curses.A_NORMAL
+
+    # Terminals that advertise the (extended) Sync capability hold a frame back until it is complete
+    sync = curses.tigetstr("Sync")
+    if sync:
+        _SYNC_OUTPUT["begin"] = curses.tparm(sync, 1)
+        _SYNC_OUTPUT["end"] = curses.tparm(sync, 2)
 
-    stdscr.bkgd(' ', curses.color_pair(COLOR_PAIR_DEFAULT)) # Set default background/foreground
+    stdscr.bkgd(' ', ATTR[COLOR_PAIR_DEFAULT]) # Set default background/foreground
 
     # --- Initial Setup ---
     if not os.path.exists(NOTES_DIR):
@@ -1422,12 +1641,9 @@ def main(stdscr):
         draw_header(stdscr)
         max_y, max_x = stdscr.getmaxyx()
         setup_y = len(SKULL_HEADER) + 3
-        try:
-            stdscr.addstr(setup_y, 2, "Welcome to Roman Zecret! 🕯️", curses.color_pair(COLOR_PAIR_INFO))
-            stdscr.addstr(setup_y + 1, 2, "Looks like it's your first time or the password file is missing.", curses.color_pair(COLOR_PAIR_INFO))
-            stdscr.addstr(setup_y + 2, 2, "Let's set up your master password.", curses.color_pair(COLOR_PAIR_INFO))
-            stdscr.refresh()
-        except curses.error: pass
+        safe_addstr(stdscr, setup_y, 2, "Welcome to Roman Zecret! 🕯️", ATTR[COLOR_PAIR_INFO])
+        safe_addstr(stdscr, setup_y + 1, 2, "Looks like it's your first time or the password file is missing.", ATTR[COLOR_PAIR_INFO])
+        safe_addstr(stdscr, setup_y + 2, 2, "Let's set up your master password.", ATTR[COLOR_PAIR_INFO])
 
         new_password = None
         while True:
@@ -1438,11 +1654,9 @@ def main(stdscr):
                  exit(0)
 
             if len(pass1) < 8:
+                 _wipe(pass1)
                  draw_message(stdscr, "Password too short (minimum 8 characters).", setup_y + 6, COLOR_PAIR_ERROR, delay=2)
-                 # Clear prompt lines
-                 stdscr.move(setup_y+4, 0); stdscr.clrtoeol()
-                 stdscr.move(setup_y+5, 0); stdscr.clrtoeol()
-                 stdscr.refresh()
+                 _clear_prompt_area(stdscr, setup_y + 4) # Clear prompt lines
                  continue
 
             pass2 = get_string_input(stdscr, setup_y + 5, 2, "Confirm Master Password: ", password=True)
@@ -1451,17 +1665,18 @@ def main(stdscr):
                  print("Setup cancelled.")
                  exit(0)
 
-            if pass1 == pass2:
+            if len(pass1) == len(pass2) and hmac.compare_digest(pass1, pass2):
                 new_password = pass1
+                _wipe(pass2)
                 break
             else:
+                _wipe(pass1)
+                _wipe(pass2)
                 draw_message(stdscr, "Passwords do not match. Try again.", setup_y + 6, COLOR_PAIR_ERROR, delay=2)
-                 # Clear prompt lines
-                stdscr.move(setup_y+4, 0); stdscr.clrtoeol()
-                stdscr.move(setup_y+5, 0); stdscr.clrtoeol()
-                stdscr.refresh()
+                _clear_prompt_area(stdscr, setup_y + 4) # Clear prompt lines
 
-        salt, encryption_key = save_password_hash(new_password)
+        salt, encryption_key = _run_with_spinner(stdscr, setup_y + 6, 2, save_password_hash, new_password)
+        _wipe(new_password)
         if not salt or not encryption_key:
              curses.endwin()
              print("CRITICAL ERROR: Failed to save password hash during setup.")
@@ -1475,10 +1690,7 @@ def main(stdscr):
         draw_header(stdscr)
         max_y, max_x = stdscr.getmaxyx()
         auth_y = len(SKULL_HEADER) + 3
-        try:
-             stdscr.addstr(auth_y, 2, "🕯️ Enter the Crypt... Password Required 🕯️", curses.color_pair(COLOR_PAIR_INFO))
-             stdscr.refresh()
-        except curses.error: pass
+        safe_addstr(stdscr, auth_y, 2, "🕯️ Enter the Crypt... Password Required 🕯️", ATTR[COLOR_PAIR_INFO])
 
         for attempt in range(3):
             password = get_string_input(stdscr, auth_y + 2 + attempt, 2, f"Password (Attempt {attempt+1}/3): ", password=True)
@@ -1487,46 +1699,76 @@ def main(stdscr):
                  print("\nAuthentication cancelled.")
                  exit(0)
 
-            verified, derived_key = verify_password(password, salt, stored_hash)
+            verified, derived_key = _run_with_spinner(stdscr, auth_y + 3 + attempt, 2, verify_password, password, salt, stored_hash)
+            _wipe(password)
             if verified:
                 encryption_key = derived_key
                 authenticated = True
-                draw_message(stdscr, "Access Granted! Welcome back... 👻", max_y - 2, COLOR_PAIR_SUCCESS, delay=1.5)
                 break
-            else:
-                draw_message(stdscr, "Incorrect Password! Access Denied.", auth_y + 3 + attempt, COLOR_PAIR_ERROR, delay=1)
+            # Same pause as the success message below, so the wait doesn't tell the two apart
+            draw_message(stdscr, "Incorrect Password! Access Denied.", auth_y + 3 + attempt, COLOR_PAIR_ERROR, delay=AUTH_RESULT_DELAY)
 
+        _kdf_cache.clear() # Retries are over either way
+        # Branch on the outcome once, after the attempts
         if not authenticated:
             curses.endwin()
             print("\nToo many failed attempts. The crypt remains sealed.")
             exit(1)
+        draw_message(stdscr, "Access Granted! Welcome back... 👻", max_y - 2, COLOR_PAIR_SUCCESS, delay=AUTH_RESULT_DELAY)
 
 
     # --- Main Menu Loop ---
-    menu_options = [
-        "Write New Zecret",
-        "Read a Zecret",
-        "Edit a Zecret",
-        "Import Encrypted Zecret",
-        "Change Master Password",
-        "Exit Roman Zecret"
-    ]
     active_option = 0
+    drawn_option = active_option # Row highlighted on screen right now
+    repaint = True # Whole menu screen needs drawing (first pass, after an action or a resize)
+    backdrop, backdrop_size = None, None # Blank screen with the header drawn in, built once per size
+
+    # The menu has nothing to animate, so it waits in a plain blocking read
+    stdscr.nodelay(False)
+    stdscr.timeout(-1)
 
     while True:
-        clear_screen(stdscr)
-        draw_header(stdscr)
-        display_menu(stdscr, menu_options, active_option)
-        stdscr.refresh()
+        if repaint:
+            # The size can only have changed on a resize or during an action, both of which repaint
+            screen_size = stdscr.getmaxyx()
+            if backdrop_size != screen_size:
+                backdrop = curses.newpad(*screen_size)
+                backdrop.bkgd(' ', ATTR[COLOR_PAIR_DEFAULT]) # Same blanks as stdscr's erase() gives
+                draw_header(backdrop)
+                backdrop_size = screen_size
+            # Copying the backdrop in replaces erase() + draw_header(); unlike clear(), it keeps
+            # curses' record of the screen, so the update only sends what changed
+            backdrop.overwrite(stdscr)
+            display_menu(stdscr, active_option, screen_size)
+            repaint = False
+        elif active_option != drawn_option:
+            # Only the old and new selections change
+            redraw_menu_row(stdscr, drawn_option, highlighted=False, screen_size=screen_size)
+            redraw_menu_row(stdscr, active_option, highlighted=True, screen_size=screen_size)
+        drawn_option = active_option
+        stdscr.noutrefresh()
+        _doupdate() # One write to the terminal per pass
 
         key = stdscr.getch() # Wait for user input
+        if key == -1: # No key after all (e.g. an interrupted read): nothing to do
+            continue
 
-        if key == curses.KEY_UP:
-            active_option = (active_option - 1) % len(menu_options)
-        elif key == curses.KEY_DOWN:
-            active_option = (active_option + 1) % len(menu_options)
+        if key in (curses.KEY_UP, curses.KEY_DOWN):
+            # A held arrow key queues many repeats: apply all that are waiting, then redraw once
+            stdscr.nodelay(True)
+            try:
+                while key in (curses.KEY_UP, curses.KEY_DOWN):
+                    active_option = _MENU_PREV[active_option] if key == curses.KEY_UP else _MENU_NEXT[active_option]
+                    key = stdscr.getch()
+            finally:
+                stdscr.nodelay(False)
+            if key != -1:
+                curses.ungetch(key) # Not an arrow: handle it on the next pass
+        elif key == curses.KEY_RESIZE:
+            repaint = True
         elif key in [curses.KEY_ENTER, 10, 13]:
-            selected_action = menu_options[active_option]
+            selected_action = MENU_OPTIONS[active_option]
+            repaint = True # Every action draws over the menu
 
             # --- Perform Action ---
             if selected_action == "Write New Zecret":
@@ -1539,10 +1781,11 @@ def main(stdscr):
                 import_entry(stdscr, encryption_key)
             elif selected_action == "Change Master Password":
                 password_changed, new_key = change_password(stdscr, encryption_key)
+                _kdf_cache.clear() # Whichever way it returned, its old-password retries are over
                 if password_changed:
                     encryption_key = new_key # Update the key in use
             elif selected_action == "Exit Roman Zecret":
-                 draw_message(stdscr, "Leaving the darkness... Farewell 💀", stdscr.getmaxyx()[0] - 2, COLOR_PAIR_INFO, delay=2, spooky=False)
+                 draw_message(stdscr, "Leaving the darkness... Farewell 💀", screen_size[0] - 2, COLOR_PAIR_INFO, delay=2, spooky=False)
                  break # Exit the main loop
             
             # After an action, pause briefly before showing menu again
@@ -1550,11 +1793,12 @@ def main(stdscr):
             # time.sleep(0.5) # Optional pause
 
         elif key in [27, ord('q'), ord('Q')]: # Allow Esc or Q to exit directly from menu
-            draw_message(stdscr, "Leaving the darkness... Farewell 💀", stdscr.getmaxyx()[0] - 2, COLOR_PAIR_INFO, delay=2, spooky=False)
+            draw_message(stdscr, "Leaving the darkness... Farewell 💀", screen_size[0] - 2, COLOR_PAIR_INFO, delay=2, spooky=False)
             break
 
 # --- Wrapper for Curses ---
 def run_app():
+    check_dependencies()
     try:
         # Initialize curses
         curses.wrapper(main)
@@ -1569,6 +1813,7 @@ def run_app():
          print("\nAn unexpected error occurred:")
          traceback.print_exc()
     finally:
+         _kdf_cache.clear() # Don't keep derived keys for past guesses around
          # Ensure terminal is restored even if errors occurred outside wrapper scope
          # (though wrapper usually handles this)
          try: